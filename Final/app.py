@@ -4,12 +4,18 @@ import sys
 from pathlib import Path
 
 from flask import Flask, jsonify, request, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 
 try:
     from dotenv import load_dotenv
 except ImportError:
     load_dotenv = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 BASE_DIR = Path(__file__).resolve().parent
 if str(BASE_DIR) not in sys.path:
     sys.path.append(str(BASE_DIR))
@@ -18,16 +24,35 @@ if load_dotenv:
     load_dotenv(dotenv_path=BASE_DIR / ".env")
 
 from services.forecast_service import ProductAnalyticsService 
+from services.precompute import ForecastPrecomputer
 
 app = Flask(__name__, static_folder=str(BASE_DIR / "static"), template_folder=str(BASE_DIR))
 
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Serialize JSON bằng orjson (nhanh hơn json chuẩn nhiều lần với mảng giá dài)."""
+
+    def dumps(self, obj: object, **kwargs: object) -> str:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+
+if orjson:
+    app.json = ORJSONProvider(app)
+
+
 service = ProductAnalyticsService(
     BASE_DIR / "dataset" / "dataset.csv",
     products_path=BASE_DIR / "dataset" / "products.csv",
     platforms_path=BASE_DIR / "dataset" / "platforms.csv",
 )
 
+precomputer = ForecastPrecomputer(service)
+if precomputer.is_enabled():
+    precomputer.start()
+
 
 @app.route("/")
 def index() -> object:
@@ -36,8 +61,23 @@ def index() -> object:
 
 @app.route("/api/catalog", methods=["GET"])
 def catalog() -> object:
-    data = service.get_catalog()
-    return jsonify(data)
+    args = request.args
+    if not any(key in args for key in ("q", "page", "page_size", "fields")):
+        body, etag = service.get_catalog_json()
+        response = app.response_class(body, mimetype="application/json")
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    fields = [field.strip() for field in args.get("fields", "").split(",") if field.strip()]
+    data = service.search_catalog(
+        query=args.get("q"),
+        page=args.get("page", 1, type=int),
+        page_size=args.get("page_size", 50, type=int),
+        fields=fields or None,
+    )
+    response = jsonify(data)
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 @app.route("/api/metrics", methods=["POST"])
@@ -46,6 +86,7 @@ def metrics() -> object:
     product_id = payload.get("product_id")
     platform = payload.get("platform")
     history_days = payload.get("history_days")
+    max_points = payload.get("max_points")
     if not product_id or not platform:
         return jsonify({"message": "Thiếu product_id hoặc platform."}), 400
 
@@ -53,6 +94,8 @@ def metrics() -> object:
         product_id=product_id,
         platform=platform,
         history_days=int(history_days) if history_days else None,
+        max_points=int(max_points) if max_points is not None else None,
+        history_format=payload.get("history_format") or "records",
     )
     return jsonify(data)
 
@@ -70,6 +113,31 @@ def predict() -> object:
     return jsonify(data)
 
 
+@app.route("/api/prices", methods=["POST"])
+def ingest_prices() -> object:
+    payload = request.get_json(force=True) or {}
+    rows = payload.get("rows")
+    if not isinstance(rows, list):
+        return jsonify({"message": "Thiếu danh sách rows."}), 400
+
+    alerts = service.ingest_prices(rows)
+    return jsonify({"ingested": len(rows), "alerts": alerts})
+
+
+@app.route("/api/alerts", methods=["GET"])
+def alerts() -> object:
+    data = service.get_alerts(
+        since=request.args.get("since", 0, type=int),
+        limit=request.args.get("limit", 100, type=int),
+    )
+    return jsonify(data)
+
+
+@app.route("/api/health", methods=["GET"])
+def health() -> object:
+    return jsonify(service.integration_health())
+
+
 @app.errorhandler(ValueError)
 def handle_value_error(error: ValueError) -> object:
     return jsonify({"message": str(error)}), 400
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    load_dotenv = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BASE_DIR = Path(__file__).resolve().parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+if load_dotenv:
+    load_dotenv(dotenv_path=BASE_DIR / ".env")
+
+from services.async_integrations import (  # noqa: E402
+    AsyncAIContentGenerator,
+    AsyncProductImageProvider,
+    AsyncTikiAPI,
+    build_async_client,
+)
+from services.forecast_service import DEFAULT_IMAGE, ProductAnalyticsService  # noqa: E402
+from services.precompute import ForecastPrecomputer  # noqa: E402
+from services.resilience import Deadline  # noqa: E402
+
+"""
+Bản ASGI của app.py: cùng route, nhưng gọi Tiki/LLM bằng httpx async (connection pool dùng chung)
+và đẩy phần pandas/torch sang thread pool để event loop không bị chặn.
+
+Chạy: uvicorn asgi:app --port 5001  (từ thư mục Final/)
+Biến môi trường: FORECAST_WORKERS (số job train đồng thời, mặc định = số CPU).
+"""
+
+http_client = build_async_client()
+ai_generator = AsyncAIContentGenerator(http_client)
+image_provider = AsyncProductImageProvider(http_client, DEFAULT_IMAGE)
+marketplace_client = AsyncTikiAPI(http_client)
+
+service = ProductAnalyticsService(
+    BASE_DIR / "dataset" / "dataset.csv",
+    products_path=BASE_DIR / "dataset" / "products.csv",
+    platforms_path=BASE_DIR / "dataset" / "platforms.csv",
+    ai_generator=ai_generator,
+    image_provider=image_provider,
+    marketplace_client=marketplace_client,
+)
+
+forecast_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FORECAST_WORKERS", str(os.cpu_count() or 1))),
+    thread_name_prefix="forecast",
+)
+precomputer = ForecastPrecomputer(service)
+
+
+async def _run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(forecast_executor, partial(func, *args, **kwargs))
+
+
+def _json(data: Any, status_code: int = 200) -> Response:
+    if orjson:
+        body = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS)
+    else:
+        body = json.dumps(data, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    return Response(body, status_code=status_code, media_type="application/json")
+
+
+def _conditional(request: Request, response: Response, etag: str) -> Response:
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return response
+
+
+def _int_arg(args: Any, key: str, default: int) -> int:
+    """Như request.args.get(key, default, type=int) của Flask: giá trị không phải số dùng default."""
+    try:
+        return int(args.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+async def _payload(request: Request) -> Dict[str, Any]:
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def _enrich(product_meta: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    image_task = asyncio.ensure_future(image_provider.resolve_async(product_meta.get("image"), deadline=deadline))
+    try:
+        enriched = await marketplace_client.enrich_product_meta_async(product_meta, deadline=deadline)
+    except Exception:
+        enriched = None
+    image = await image_task
+    if enriched is None and not image:
+        return product_meta
+    enriched = enriched or product_meta
+    # Ảnh từ Tiki được ưu tiên; chỉ thay URL dự phòng bằng ảnh Unsplash khi Tiki không đổi ảnh.
+    if image and enriched.get("image") == product_meta.get("image"):
+        enriched = {**enriched, "image": image}
+    service.store_product_meta(enriched)
+    return enriched
+
+
+async def _resolve_catalog_images(concurrency: int = 8) -> None:
+    """Tra Unsplash (async) cho các ảnh catalog đang dùng URL dự phòng lúc khởi động."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(product: Dict[str, Any]) -> None:
+        async with semaphore:
+            image = await image_provider.resolve_async(product.get("image"))
+        current = service.catalog_store.get(product["id"])
+        if image and current and current.get("image") == product.get("image"):
+            service.store_product_meta({**current, "image": image})
+
+    pending = [product for product in service.catalog_store.products() if product.get("image") in image_provider.pending]
+    await asyncio.gather(*(resolve(product) for product in pending))
+
+
+async def index(request: Request) -> Response:
+    return FileResponse(BASE_DIR / "index.html")
+
+
+async def catalog(request: Request) -> Response:
+    args = request.query_params
+    if not any(key in args for key in ("q", "page", "page_size", "fields")):
+        body, etag = service.get_catalog_json()
+        return _conditional(request, Response(body, media_type="application/json"), f'"{etag}"')
+
+    fields = [field.strip() for field in args.get("fields", "").split(",") if field.strip()]
+    data = service.search_catalog(
+        query=args.get("q"),
+        page=_int_arg(args, "page", 1),
+        page_size=_int_arg(args, "page_size", 50),
+        fields=fields or None,
+    )
+    response = _json(data)
+    return _conditional(request, response, f'"{hashlib.sha1(response.body).hexdigest()}"')
+
+
+async def metrics(request: Request) -> Response:
+    payload = await _payload(request)
+    product_id = payload.get("product_id")
+    platform = payload.get("platform")
+    history_days = payload.get("history_days")
+    max_points = payload.get("max_points")
+    if not product_id or not platform:
+        return _json({"message": "Thiếu product_id hoặc platform."}, 400)
+
+    deadline = Deadline.after(service.request_budget)
+    data = await _run_blocking(
+        service.get_metrics,
+        product_id=product_id,
+        platform=platform,
+        history_days=int(history_days) if history_days else None,
+        max_points=int(max_points) if max_points is not None else None,
+        history_format=payload.get("history_format") or "records",
+        enrich=False,
+    )
+    data["product"] = await _enrich(data["product"], deadline)
+    return _json(data)
+
+
+async def predict(request: Request) -> Response:
+    payload = await _payload(request)
+    product_id = payload.get("product_id")
+    platform = payload.get("platform")
+    future_days = int(payload.get("future_days", 7))
+    if not product_id or not platform:
+        return _json({"message": "Thiếu product_id hoặc platform."}, 400)
+
+    deadline = Deadline.after(service.request_budget)
+    product_meta = await _run_blocking(service.get_product_meta, product_id, enrich=False, deadline=deadline)
+    # Tiki chạy song song với train; LLM cần kết quả dự báo nên gọi sau, vẫn song song với Tiki nếu Tiki chậm.
+    enrich_task = asyncio.ensure_future(_enrich(product_meta, deadline))
+    try:
+        forecast, precomputed = await _run_blocking(service.get_forecast, product_id, platform, future_days)
+    except BaseException:
+        enrich_task.cancel()
+        raise
+
+    summary_payload = None
+    if not precomputed:
+        summary_task = ai_generator.generate_summary_async(
+            product_meta["name"], platform, forecast.recent_prices, forecast.raw_predictions, deadline=deadline
+        )
+        product_meta, summary_payload = await asyncio.gather(enrich_task, summary_task)
+    else:
+        product_meta = await enrich_task
+
+    return _json(service.build_prediction_response(product_meta, platform, forecast, precomputed, summary_payload))
+
+
+async def ingest_prices(request: Request) -> Response:
+    payload = await _payload(request)
+    rows = payload.get("rows")
+    if not isinstance(rows, list):
+        return _json({"message": "Thiếu danh sách rows."}, 400)
+
+    alerts = await _run_blocking(service.ingest_prices, rows)
+    return _json({"ingested": len(rows), "alerts": alerts})
+
+
+async def alerts(request: Request) -> Response:
+    args = request.query_params
+    return _json(service.get_alerts(since=_int_arg(args, "since", 0), limit=_int_arg(args, "limit", 100)))
+
+
+async def health(request: Request) -> Response:
+    return _json(service.integration_health())
+
+
+async def handle_value_error(request: Request, error: ValueError) -> Response:
+    return _json({"message": str(error)}, 400)
+
+
+async def handle_exception(request: Request, error: Exception) -> Response:
+    return _json({"message": "Đã xảy ra lỗi ngoài ý muốn.", "detail": str(error)}, 500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    if precomputer.is_enabled():
+        precomputer.start()
+    image_task = asyncio.ensure_future(_resolve_catalog_images())
+    yield
+    image_task.cancel()
+    precomputer.stop(timeout=1)
+    await http_client.aclose()
+    forecast_executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route("/", index),
+        Route("/api/catalog", catalog, methods=["GET"]),
+        Route("/api/metrics", metrics, methods=["POST"]),
+        Route("/api/predict", predict, methods=["POST"]),
+        Route("/api/prices", ingest_prices, methods=["POST"]),
+        Route("/api/alerts", alerts, methods=["GET"]),
+        Route("/api/health", health, methods=["GET"]),
+        Mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static"),
+    ],
+    exception_handlers={ValueError: handle_value_error, Exception: handle_exception},
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=5001)
@@ -0,0 +1,107 @@
+"""
+Đo throughput (dòng/giây) của PriceAlertEngine khi replay dataset.csv, so với cách tính lại trên DataFrame
+cho mỗi dòng mới (lọc series + min 30 ngày + giá mới nhất các sàn). Đo thêm đường đầy đủ qua
+ProductAnalyticsService.ingest_prices (mỗi lần gọi một dòng, như POST /api/prices), có và không có đọc xen kẽ.
+
+Chạy: python benchmarks/alert_throughput.py dataset/dataset.csv --naive-rows 500 --service-rows 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from services.price_alerts import PriceAlertEngine  # noqa: E402
+
+
+def _naive_replay(df: pd.DataFrame, start: int, rows: int, window_days: int, undercut_pct: float) -> int:
+    fired = 0
+    for idx in range(start, start + rows):
+        row = df.iloc[idx]
+        seen = df.iloc[:idx]
+        series = seen[(seen["product_id"] == row["product_id"]) & (seen["platform"] == row["platform"])]
+        recent = series[series["date"] > row["date"] - pd.Timedelta(days=window_days)]
+        if len(recent) and row["price"] < recent["price"].min():
+            fired += 1
+        others = seen[(seen["product_id"] == row["product_id"]) & (seen["platform"] != row["platform"])]
+        latest = others.groupby("platform")["price"].last()
+        if len(latest) and row["price"] <= latest.min() * (1 - undercut_pct / 100):
+            fired += 1
+    return fired
+
+
+def _service_replay(csv_path: str, df: pd.DataFrame, rows: int, read_every: int) -> float:
+    """Phát lại `rows` dòng cuối (dời sang sau ngày cuối của dataset) qua ingest_prices, trả về dòng/giây."""
+    os.environ.setdefault("ENABLE_TIKI_API", "0")
+    from services.forecast_service import ProductAnalyticsService
+
+    service = ProductAnalyticsService(csv_path)
+    tail = df.tail(rows)
+    offset = df["date"].max() - tail["date"].min() + pd.Timedelta(days=1)
+    records = [
+        {"product_id": row.product_id, "platform": row.platform, "date": str((row.date + offset).date()), "price": price}
+        for row, price in zip(tail.itertuples(index=False), tail["price"])
+    ]
+    service.ingest_prices(records[:1])  # bootstrap engine cảnh báo, không tính vào thời gian
+    start = time.perf_counter()
+    for idx, record in enumerate(records[1:], start=1):
+        service.ingest_prices([record])
+        if read_every and idx % read_every == 0:
+            service.series_by_popularity()
+    elapsed = time.perf_counter() - start
+    assert len(service.df) == len(df) + len(records)
+    return (len(records) - 1) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_path")
+    parser.add_argument("--window-days", type=int, default=30)
+    parser.add_argument("--undercut-pct", type=float, default=5.0)
+    parser.add_argument("--naive-rows", type=int, default=500, help="Số dòng cuối dùng cho cách tính lại (chậm).")
+    parser.add_argument("--service-rows", type=int, default=5000, help="Số dòng phát lại qua ingest_prices.")
+    parser.add_argument("--read-every", type=int, default=100, help="Đọc self.df sau mỗi N dòng (0 = không).")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv_path)
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values("date", kind="mergesort").reset_index(drop=True)
+    records = df[["product_id", "platform", "date", "price"]].to_dict(orient="records")
+
+    engine = PriceAlertEngine(window_days=args.window_days, undercut_pct=args.undercut_pct)
+    start = time.perf_counter()
+    fired = engine.ingest(records)
+    elapsed = time.perf_counter() - start
+    print(f"incremental: {len(records)} dòng, {len(fired)} cảnh báo, {len(records) / elapsed:,.0f} dòng/giây")
+
+    bootstrap = PriceAlertEngine(window_days=args.window_days, undercut_pct=args.undercut_pct)
+    start = time.perf_counter()
+    bootstrap.bootstrap(df)
+    elapsed = time.perf_counter() - start
+    print(f"bootstrap:   {len(df)} dòng, {len(df) / elapsed:,.0f} dòng/giây (nạp lịch sử, không bắn cảnh báo)")
+
+    rows = min(args.naive_rows, len(df))
+    start = time.perf_counter()
+    naive_fired = _naive_replay(df, len(df) - rows, rows, args.window_days, args.undercut_pct)
+    elapsed = time.perf_counter() - start
+    print(f"recompute:   {rows} dòng cuối, {naive_fired} lần thỏa luật, {rows / elapsed:,.0f} dòng/giây")
+
+    if args.service_rows:
+        rows = min(args.service_rows, len(df))
+        print(f"ingest_prices: {rows} lần gọi 1 dòng, {_service_replay(args.csv_path, df, rows, 0):,.0f} dòng/giây")
+        if args.read_every:
+            rate = _service_replay(args.csv_path, df, rows, args.read_every)
+            print(f"ingest_prices: đọc df sau mỗi {args.read_every} dòng, {rate:,.0f} dòng/giây")
+
+
+if __name__ == "__main__":
+    main()
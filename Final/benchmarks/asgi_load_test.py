@@ -0,0 +1,178 @@
+"""
+Load test so sánh app.py (Flask/WSGI) với asgi.py khi upstream chậm.
+
+Chạy (từ thư mục Final/, cần dataset/dataset.csv):
+    python benchmarks/asgi_load_test.py --requests 200 --concurrency 50 --flask-threads 8 --tiki-delay 0.3
+    python benchmarks/asgi_load_test.py --endpoint predict --tiki-delay 0.3 --llm-delay 0.5
+
+Một stub upstream cục bộ giả lập Tiki (trễ --tiki-delay giây) và LLM (endpoint chat completions, trễ
+--llm-delay giây). Cache Tiki bị tắt để mọi request đều gọi upstream. --flask-threads giới hạn số request
+Flask xử lý đồng thời, tương đương `gunicorn --threads N`.
+
+--endpoint predict đo fan-out Tiki + LLM của /api/predict: dự báo của --series series được train một lần
+trước khi đo rồi trả lại như một lần tính mới (precomputed=False), nên mỗi request vẫn gọi Tiki và LLM
+nhưng không train lại.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from werkzeug.serving import make_server
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+
+class _NoCache(dict):
+    def __setitem__(self, key: Any, value: Any) -> None:
+        pass
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _stub_upstream(tiki_delay: float, llm_delay: float = 0.0) -> Starlette:
+    async def products(request):
+        await asyncio.sleep(tiki_delay)
+        item = {"id": 1, "name": request.query_params.get("q"), "price": 100000, "url_path": "stub"}
+        return JSONResponse({"data": [item]})
+
+    async def chat_completions(request):
+        await asyncio.sleep(llm_delay)
+        content = '{"analysis": "Giá ổn định.", "recommendation": "Có thể mua."}'
+        return JSONResponse({"choices": [{"message": {"content": content}}]})
+
+    return Starlette(
+        routes=[
+            Route("/products", products),
+            Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        ]
+    )
+
+
+def _serve_uvicorn(app: Any, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _serve_flask(flask_app: Any, port: int, threads: int) -> Any:
+    slots = threading.BoundedSemaphore(threads)
+    original = flask_app.wsgi_app
+
+    def limited(environ, start_response):
+        with slots:
+            return original(environ, start_response)
+
+    flask_app.wsgi_app = limited
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", port, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _freeze_forecasts(service: Any, series: List[Tuple[str, str]], future_days: int) -> None:
+    """Train trước dự báo cho `series` rồi trả lại chúng như kết quả tính mới (để request vẫn gọi LLM)."""
+    forecasts = {key: service._forecast_series(key[0], key[1], future_days) for key in series}
+    service._forecast_series = lambda product_id, platform, days: forecasts[(product_id, platform)]
+
+
+async def _load(
+    base_url: str, series: List[Tuple[str, str]], total: int, concurrency: int, endpoint: str = "metrics"
+) -> Tuple[float, List[float]]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+
+        async def one(idx: int) -> None:
+            product_id, platform = series[idx % len(series)]
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.post(f"/api/{endpoint}", json={"product_id": product_id, "platform": platform})
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(idx) for idx in range(total)))
+        return time.perf_counter() - start, latencies
+
+
+def _report(label: str, elapsed: float, latencies: List[float]) -> None:
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<8} {len(latencies) / elapsed:>8.1f} req/s  p50={p50 * 1000:>7.0f}ms  p95={p95 * 1000:>7.0f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--flask-threads", type=int, default=8)
+    parser.add_argument("--tiki-delay", type=float, default=0.3)
+    parser.add_argument("--llm-delay", type=float, default=0.5)
+    parser.add_argument("--endpoint", choices=("metrics", "predict"), default="metrics")
+    parser.add_argument("--series", type=int, default=4, help="Số series dùng cho --endpoint predict.")
+    args = parser.parse_args()
+
+    stub_port = _free_port()
+    _serve_uvicorn(_stub_upstream(args.tiki_delay, args.llm_delay), stub_port)
+    os.environ.update(
+        {
+            "ENABLE_TIKI_API": "1",
+            "TIKI_API_BASE": f"http://127.0.0.1:{stub_port}",
+            "TIKI_PREFETCH_LIMIT": "0",
+            "GEN_AI_API_KEY": "stub",
+            "GEN_AI_API_URL": f"http://127.0.0.1:{stub_port}/v1/chat/completions",
+        }
+    )
+
+    import app as flask_module
+    import asgi as asgi_module
+
+    for module in (flask_module, asgi_module):
+        module.service.marketplace_client.search_cache = _NoCache()
+        module.service.marketplace_client.snapshot_cache = _NoCache()
+    series = flask_module.service.series_by_popularity()
+    if args.endpoint == "predict":
+        series = series[: args.series]
+        for module in (flask_module, asgi_module):
+            _freeze_forecasts(module.service, series, future_days=7)
+
+    flask_port, asgi_port = _free_port(), _free_port()
+    _serve_flask(flask_module.app, flask_port, args.flask_threads)
+    _serve_uvicorn(asgi_module.app, asgi_port)
+
+    print(
+        f"/api/{args.endpoint}: {args.requests} requests, concurrency={args.concurrency}, "
+        f"tiki_delay={args.tiki_delay}s, llm_delay={args.llm_delay}s"
+    )
+    for label, port in (("flask", flask_port), ("asgi", asgi_port)):
+        base_url = f"http://127.0.0.1:{port}"
+        _report(label, *asyncio.run(_load(base_url, series, args.requests, args.concurrency, args.endpoint)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Độ trễ /api/metrics khi Tiki bị treo: timeout cố định (breaker tắt) so với circuit breaker và deadline.
+
+Chạy (từ thư mục Final/, cần dataset/dataset.csv):
+    python benchmarks/degraded_upstream_report.py --requests 40 --tiki-delay 3 --tiki-timeout 1 --budget 0.3
+
+Stub Tiki cục bộ trả lời sau --tiki-delay giây (lâu hơn timeout nên mọi lời gọi đều lỗi). Cache Tiki bị tắt.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from asgi_load_test import _free_port, _NoCache, _serve_uvicorn, _stub_upstream  # noqa: E402
+
+
+def _measure(service, series, requests: int, budget: Optional[float]) -> List[float]:
+    from services.resilience import Deadline
+
+    latencies = []
+    for idx in range(requests):
+        product_id, platform = series[idx % len(series)]
+        start = time.perf_counter()
+        service.get_metrics(product_id, platform, deadline=Deadline.after(budget))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _report(label: str, latencies: List[float]) -> None:
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<18} p50={p50 * 1000:>7.0f}ms  p95={p95 * 1000:>7.0f}ms  total={sum(latencies):>6.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--tiki-delay", type=float, default=3.0)
+    parser.add_argument("--tiki-timeout", type=float, default=1.0)
+    parser.add_argument("--budget", type=float, default=0.3, help="Ngân sách thời gian mỗi request (giây).")
+    args = parser.parse_args()
+
+    stub_port = _free_port()
+    _serve_uvicorn(_stub_upstream(args.tiki_delay), stub_port)
+    os.environ.update({"ENABLE_TIKI_API": "1", "TIKI_PREFETCH_LIMIT": "0"})
+
+    from services.forecast_service import ProductAnalyticsService
+    from services.integrations import TikiAPI
+    from services.resilience import CircuitBreaker
+
+    def build(breaker_enabled: bool) -> ProductAnalyticsService:
+        client = TikiAPI(base_url=f"http://127.0.0.1:{stub_port}", timeout=args.tiki_timeout)
+        client.search_cache = _NoCache()
+        client.snapshot_cache = _NoCache()
+        if not breaker_enabled:
+            # Tương đương bản cũ: không bao giờ mở mạch, luôn chờ đủ timeout cố định.
+            client.breaker = CircuitBreaker("tiki", max_timeout=args.tiki_timeout, failure_threshold=10**9)
+        return ProductAnalyticsService(BASE_DIR / "dataset" / "dataset.csv", marketplace_client=client)
+
+    fixed = build(breaker_enabled=False)
+    series = fixed.series_by_popularity()
+    print(f"{args.requests} request, tiki_delay={args.tiki_delay}s, tiki_timeout={args.tiki_timeout}s")
+    _report("fixed timeout", _measure(fixed, series, args.requests, None))
+    _report("circuit breaker", _measure(build(breaker_enabled=True), series, args.requests, None))
+    _report(f"budget {args.budget}s", _measure(build(breaker_enabled=True), series, args.requests, args.budget))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Train model global trên toàn catalog (trừ --horizon ngày cuối mỗi series) rồi báo cáo:
+thời gian train, độ trễ mỗi request (một lần forward) và MAPE trên holdout cho
+- series đầy đủ lịch sử,
+- cold-start: chỉ giữ --cold-days ngày cuối và coi product_id là SKU mới (chỉ còn brand/category/platform),
+- baseline giữ nguyên giá cuối, và (tùy chọn) LSTM riêng cho --lstm-series series đầu.
+
+Chạy: python benchmarks/global_model_report.py dataset/dataset.csv --epochs 5 --lstm-series 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from models.LSTM import ForecastConfig, train_and_predict  # noqa: E402
+from models.global_model import GlobalForecaster, GlobalModelConfig  # noqa: E402
+
+
+def _mape(actual: np.ndarray, predicted: np.ndarray) -> float:
+    return float(np.mean(np.abs((actual - predicted) / actual)) * 100)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_path")
+    parser.add_argument("--products", default=None)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--cold-days", type=int, default=10)
+    parser.add_argument("--lstm-series", type=int, default=0)
+    parser.add_argument("--lstm-epochs", type=int, default=10)
+    args = parser.parse_args()
+
+    csv_path = Path(args.csv_path)
+    df = pd.read_csv(csv_path, parse_dates=["date"]).sort_values("date", kind="mergesort")
+    products_path = Path(args.products) if args.products else csv_path.parent / "products.csv"
+    if products_path.exists():
+        df = df.merge(pd.read_csv(products_path)[["product_id", "brand", "category"]], on="product_id", how="left")
+
+    position = df.groupby(["product_id", "platform"]).cumcount(ascending=False)
+    train_df, holdout_df = df[position >= args.horizon], df[position < args.horizon]
+
+    forecaster = GlobalForecaster(GlobalModelConfig(epochs=args.epochs)).fit(train_df)
+    series = train_df.groupby(["product_id", "platform"], sort=False)
+    holdout = holdout_df.groupby(["product_id", "platform"], sort=False)
+    print(f"Train model global: {series.ngroups} series, {len(train_df)} dòng, {forecaster.train_seconds:.1f}s")
+
+    scores = {"global": [], "cold-start": [], "last value": []}
+    latencies = []
+    for key, group in series:
+        actual = holdout.get_group(key)["price"].to_numpy(dtype=np.float64)
+        meta = {"product_id": key[0], "platform": key[1], **group.iloc[0][["brand", "category"]].to_dict()}
+        prices, promo = group["price"].to_numpy(dtype=np.float64), group["is_promo"].to_numpy()
+
+        start = time.perf_counter()
+        predicted = forecaster.predict(prices, meta, args.horizon, promo=promo)
+        latencies.append(time.perf_counter() - start)
+        scores["global"].append(_mape(actual, predicted))
+
+        cold = forecaster.predict(prices[-args.cold_days :], {**meta, "product_id": None}, args.horizon, promo=promo)
+        scores["cold-start"].append(_mape(actual, cold))
+        scores["last value"].append(_mape(actual, np.full(args.horizon, prices[-1])))
+
+    latencies_ms = np.array(latencies) * 1000
+    print(f"Độ trễ dự báo: p50={np.median(latencies_ms):.2f}ms p95={np.percentile(latencies_ms, 95):.2f}ms")
+    for label, values in scores.items():
+        print(f"MAPE {label:<12} {np.mean(values):.3f}%")
+
+    if args.lstm_series:
+        mapes, seconds = [], 0.0
+        for key, group in list(series)[: args.lstm_series]:
+            config = ForecastConfig(
+                csv_path=str(csv_path), product_id=key[0], platform=key[1], seq_len=120, epochs=args.lstm_epochs
+            )
+            start = time.perf_counter()
+            result = train_and_predict(config, future_days=args.horizon, df=group, device="cpu")
+            seconds += time.perf_counter() - start
+            mapes.append(_mape(holdout.get_group(key)["price"].to_numpy(dtype=np.float64), result.predictions))
+        print(
+            f"LSTM riêng ({args.lstm_series} series): MAPE {np.mean(mapes):.3f}%, "
+            f"{seconds / args.lstm_series:.1f}s train+dự báo mỗi request"
+        )
+
+
+if __name__ == "__main__":
+    main()
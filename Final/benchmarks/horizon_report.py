@@ -0,0 +1,109 @@
+"""
+So sánh rollout autoregressive với head direct multi-horizon cho các horizon 7/14/30 ngày.
+
+Chạy: python benchmarks/horizon_report.py dataset/dataset.csv --limit 5
+Mỗi series giữ lại `max(horizons)` ngày cuối làm holdout; MAPE tính trên `h` ngày đầu của holdout.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from models.LSTM import (  # noqa: E402
+    ForecastConfig,
+    _fit_model,
+    _forecast,
+    _prepare_dataframe,
+    _prepare_series,
+    build_dataloaders,
+)
+
+
+def _mape(actual: np.ndarray, predicted: np.ndarray) -> float:
+    actual = np.asarray(actual, dtype=np.float64)
+    mask = actual != 0
+    if not mask.any():
+        return float("nan")
+    return float(np.mean(np.abs((actual[mask] - predicted[mask]) / actual[mask])) * 100)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_path")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seq-len", type=int, default=120)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[7, 14, 30])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    max_horizon = max(args.horizons)
+    df = _prepare_dataframe(ForecastConfig(csv_path=args.csv_path, product_id="", platform=""), pd.read_csv(args.csv_path))
+    series = df[["product_id", "platform"]].drop_duplicates().head(args.limit).itertuples(index=False)
+
+    # mode -> horizon -> list[(mape, ms)]
+    totals = {mode: {h: [] for h in args.horizons} for mode in ("autoregressive", "direct")}
+    train_seconds = {"autoregressive": 0.0, "direct": 0.0}
+    test_losses = {"autoregressive": [], "direct": []}
+    for product_id, platform in series:
+        series_df = df[(df["product_id"] == product_id) & (df["platform"] == platform)]
+        train_df = series_df.iloc[:-max_horizon]
+        holdout = series_df["price"].to_numpy()[-max_horizon:]
+        for mode in totals:
+            config = ForecastConfig(
+                csv_path=args.csv_path,
+                product_id=product_id,
+                platform=platform,
+                seq_len=args.seq_len,
+                epochs=args.epochs,
+                forecast_mode=mode,
+                max_horizon=max_horizon,
+            )
+            try:
+                _, data_scaled, scaler = _prepare_series(train_df, config)
+                train_loader, test_loader = build_dataloaders(
+                    data_scaled, config.seq_len, config.batch_size, horizon=config.output_size
+                )
+            except ValueError:
+                break
+            start = time.perf_counter()
+            model, _, test_loss = _fit_model(train_loader, test_loader, data_scaled.shape[1], config, "cpu")
+            train_seconds[mode] += time.perf_counter() - start
+            test_losses[mode].append(test_loss)
+
+            for horizon in args.horizons:
+                predictions = _forecast(model, scaler, data_scaled, config, horizon, "cpu")
+                start = time.perf_counter()
+                for _ in range(args.repeats):
+                    _forecast(model, scaler, data_scaled, config, horizon, "cpu")
+                latency = (time.perf_counter() - start) / args.repeats * 1000
+                totals[mode][horizon].append((_mape(holdout[:horizon], predictions), latency))
+
+    header = f"{'mode':<16}{'horizon':>8}{'MAPE%':>10}{'ms/forecast':>13}"
+    print(header)
+    print("-" * len(header))
+    for mode, by_horizon in totals.items():
+        for horizon, rows in by_horizon.items():
+            if not rows:
+                continue
+            mape, latency = np.mean(rows, axis=0)
+            print(f"{mode:<16}{horizon:>8}{mape:>10.3f}{latency:>13.2f}")
+    print(
+        "Test loss (MSE, đã scale): "
+        + " ".join(f"{mode}={np.mean(losses):.5f}" for mode, losses in test_losses.items() if losses)
+    )
+    print(f"Thời gian train: autoregressive={train_seconds['autoregressive']:.1f}s direct={train_seconds['direct']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
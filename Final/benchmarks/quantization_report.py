@@ -0,0 +1,115 @@
+"""
+So sánh độ chính xác và độ trễ suy luận giữa eager / TorchScript / TorchScript + int8 theo từng series.
+
+Chạy: python benchmarks/quantization_report.py dataset/dataset.csv --limit 5
+Mỗi series được train một lần, giữ lại `future_days` điểm cuối làm holdout để tính MAPE.
+Kết luận theo từng series được ghi vào quantization_verdicts.json (cạnh csv_path); service đọc file này để chọn
+backend cho từng series.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from models.LSTM import (  # noqa: E402
+    ForecastConfig,
+    _fit_model,
+    _prepare_dataframe,
+    _prepare_series,
+    build_dataloaders,
+    compile_for_inference,
+    forecast_future_prices,
+)
+from models.quantization_verdicts import save_quantization_verdicts  # noqa: E402
+
+
+def _mape(actual: np.ndarray, predicted: np.ndarray) -> float:
+    actual = np.asarray(actual, dtype=np.float64)
+    mask = actual != 0
+    if not mask.any():
+        return float("nan")
+    return float(np.mean(np.abs((actual[mask] - predicted[mask]) / actual[mask])) * 100)
+
+
+def _time_forecast(model, scaler, data_scaled, seq_len: int, future_days: int, repeats: int) -> tuple:
+    predictions = forecast_future_prices(model, scaler, data_scaled, seq_len, future_days, "cpu")
+    start = time.perf_counter()
+    for _ in range(repeats):
+        forecast_future_prices(model, scaler, data_scaled, seq_len, future_days, "cpu")
+    return predictions, (time.perf_counter() - start) / repeats * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_path")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seq-len", type=int, default=120)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--future-days", type=int, default=7)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--max-mape-increase", type=float, default=0.1, help="Ngưỡng (điểm %) để bật int8.")
+    parser.add_argument("--output", default=None, help="Mặc định: quantization_verdicts.json cạnh csv_path.")
+    args = parser.parse_args()
+
+    df = _prepare_dataframe(ForecastConfig(csv_path=args.csv_path, product_id="", platform=""), pd.read_csv(args.csv_path))
+    series = df[["product_id", "platform"]].drop_duplicates().head(args.limit).itertuples(index=False)
+
+    header = f"{'series':<32}{'backend':<13}{'MAPE%':>8}{'ms/forecast':>13}"
+    print(header)
+    print("-" * len(header))
+    verdicts: dict = {}
+    for product_id, platform in series:
+        config = ForecastConfig(
+            csv_path=args.csv_path,
+            product_id=product_id,
+            platform=platform,
+            seq_len=args.seq_len,
+            epochs=args.epochs,
+        )
+        mask = (df["product_id"] == product_id) & (df["platform"] == platform)
+        series_df = df[mask]
+        train_df, holdout = series_df.iloc[: -args.future_days], series_df["price"].to_numpy()[-args.future_days :]
+        try:
+            _, data_scaled, scaler = _prepare_series(train_df, config)
+        except ValueError:
+            continue
+        train_loader, test_loader = build_dataloaders(data_scaled, config.seq_len, config.batch_size)
+        model, _, _ = _fit_model(train_loader, test_loader, data_scaled.shape[1], config, "cpu")
+
+        candidates = {
+            "eager": model.eval(),
+            "torchscript": compile_for_inference(model, config.seq_len, data_scaled.shape[1]),
+            "quantized": compile_for_inference(model, config.seq_len, data_scaled.shape[1], quantize=True),
+        }
+        results = {}
+        for backend, module in candidates.items():
+            predictions, latency = _time_forecast(
+                module, scaler, data_scaled, config.seq_len, args.future_days, args.repeats
+            )
+            results[backend] = (_mape(holdout, predictions), latency)
+            print(f"{product_id + '/' + platform:<32}{backend:<13}{results[backend][0]:>8.3f}{latency:>13.2f}")
+
+        increase = results["quantized"][0] - results["torchscript"][0]
+        faster = results["quantized"][1] < results["torchscript"][1]
+        backend = "quantized" if increase <= args.max_mape_increase and faster else "torchscript"
+        verdicts.setdefault(product_id, {})[platform] = backend
+        verdict = "bật int8" if backend == "quantized" else "giữ fp32"
+        print(f"{'':<32}{'=> ' + verdict} (ΔMAPE {increase:+.3f} điểm %)")
+
+    output = Path(args.output) if args.output else Path(args.csv_path).parent / "quantization_verdicts.json"
+    save_quantization_verdicts(output, verdicts)
+    print(f"Đã lưu kết luận cho {sum(len(item) for item in verdicts.values())} series vào {output}")
+
+
+if __name__ == "__main__":
+    main()
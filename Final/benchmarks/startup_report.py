@@ -0,0 +1,49 @@
+"""
+Đo thời gian import + RSS khi khởi động service, so sánh với việc nạp sẵn torch/sklearn.
+
+Chạy: python benchmarks/startup_report.py  (từ thư mục Final/)
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+PROBE = """
+import json, resource, sys, time
+sys.path.insert(0, {base!r})
+start = time.perf_counter()
+import services.forecast_service
+if {eager}:
+    services.forecast_service._load_forecaster()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "import_seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_loaded": "torch" in sys.modules,
+}}))
+"""
+
+
+def _measure(eager: bool) -> dict:
+    code = PROBE.format(base=str(BASE_DIR), eager=eager)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(repeats: int = 3) -> None:
+    for label, eager in (("lazy (mặc định)", False), ("eager (nạp models.LSTM)", True)):
+        runs = [_measure(eager) for _ in range(repeats)]
+        best = min(runs, key=lambda item: item["import_seconds"])
+        print(
+            f"{label:<26} import={best['import_seconds']:.3f}s "
+            f"rss={best['max_rss_mb']:.1f}MB torch_loaded={best['torch_loaded']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
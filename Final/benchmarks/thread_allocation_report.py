@@ -0,0 +1,106 @@
+"""
+So sánh số thread cố định (1 thread/job, như OMP_NUM_THREADS=1) với CpuAllocator:
+độ trễ của một request lẻ trên máy rảnh và throughput khi --concurrency job train cùng lúc.
+Cột threads là số thread torch mà chính thread train thấy sau mỗi epoch (min-max), để kiểm tra phần chia
+thực sự được áp dụng trên từng thread. Kết quả chỉ có ý nghĩa trên máy nhiều core.
+
+Chạy: python benchmarks/thread_allocation_report.py dataset/dataset.csv --concurrency 8 --epochs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+import torch  # noqa: E402
+
+from models.LSTM import ForecastConfig, _prepare_dataframe, train_and_predict  # noqa: E402
+from models.cpu_allocator import CpuAllocator  # noqa: E402
+
+
+def _train(
+    df: pd.DataFrame, series: Tuple[str, str], args: argparse.Namespace, allocator, observed: List[int]
+) -> float:
+    config = ForecastConfig(
+        csv_path=args.csv_path,
+        product_id=series[0],
+        platform=series[1],
+        seq_len=args.seq_len,
+        epochs=args.epochs,
+        hidden_size=args.hidden_size,
+    )
+    start = time.perf_counter()
+    def record(epoch: int, train_loss: float, test_loss: float) -> bool:
+        observed.append(torch.get_num_threads())
+        return False
+
+    if allocator is None:
+        torch.set_num_threads(1)
+        train_and_predict(config, future_days=7, df=df, device="cpu", epoch_callback=record)
+    else:
+        with allocator.job() as lease:
+
+            def rebalance(epoch: int, train_loss: float, test_loss: float) -> bool:
+                lease.epoch_callback(epoch, train_loss, test_loss)
+                return record(epoch, train_loss, test_loss)
+
+            train_and_predict(config, future_days=7, df=df, device="cpu", epoch_callback=rebalance)
+    return time.perf_counter() - start
+
+
+def _run(
+    df: pd.DataFrame, series: List[Tuple[str, str]], args: argparse.Namespace, allocator
+) -> Tuple[float, float, List[int], List[int]]:
+    single_threads: List[int] = []
+    single = _train(df, series[0], args, allocator, single_threads)
+    jobs = [series[idx % len(series)] for idx in range(args.jobs)]
+    loaded_threads: List[int] = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(lambda item: _train(df, item, args, allocator, loaded_threads), jobs))
+    return single, len(jobs) / (time.perf_counter() - start), single_threads, loaded_threads
+
+
+def _span(values: List[int]) -> str:
+    return f"{min(values)}-{max(values)}" if values else "-"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_path")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--jobs", type=int, default=None, help="Số job ở pha tải cao (mặc định 2 x concurrency).")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--seq-len", type=int, default=60)
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--pin", action="store_true", help="Bật ghim core cho allocator.")
+    args = parser.parse_args()
+    args.jobs = args.jobs or 2 * args.concurrency
+
+    df = _prepare_dataframe(ForecastConfig(csv_path=args.csv_path, product_id="", platform=""), pd.read_csv(args.csv_path))
+    series = list(df[["product_id", "platform"]].drop_duplicates().itertuples(index=False, name=None))[: args.jobs]
+
+    allocator = CpuAllocator(pin=args.pin)
+    _train(df, series[0], args, None, [])  # warm-up: import lazy + cấp phát lần đầu của torch
+    print(f"{len(allocator.cores)} core, concurrency={args.concurrency}, {args.jobs} job, epochs={args.epochs}")
+    print(f"{'mode':<10}{'single s':>10}{'threads':>9}{'jobs/s':>10}{'threads':>9}")
+    for label, mode in (("fixed-1", None), ("adaptive", allocator)):
+        single, throughput, single_threads, loaded_threads = _run(df, series, args, mode)
+        print(
+            f"{label:<10}{single:>10.2f}{_span(single_threads):>9}{throughput:>10.2f}{_span(loaded_threads):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Đo chi phí của khoảng dự báo MC dropout so với dự báo điểm, và tỉ lệ holdout rơi vào khoảng p10-p90
+trước (raw) và sau khi hiệu chỉnh độ rộng bằng backtest trên phần test (calibrated, mục tiêu 80%).
+
+Chạy: python benchmarks/uncertainty_report.py dataset/dataset.csv --limit 5 --samples 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from models.LSTM import (  # noqa: E402
+    ForecastConfig,
+    _fit_model,
+    _forecast,
+    _prepare_dataframe,
+    _prepare_series,
+    build_dataloaders,
+    calibrate_interval_scale,
+    forecast_intervals,
+    scale_intervals,
+)
+
+
+def _timed(func, repeats: int):
+    result = func()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return result, (time.perf_counter() - start) / repeats * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_path")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--seq-len", type=int, default=120)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--future-days", type=int, default=7)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--forecast-mode", default="autoregressive")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    df = _prepare_dataframe(ForecastConfig(csv_path=args.csv_path, product_id="", platform=""), pd.read_csv(args.csv_path))
+    series = df[["product_id", "platform"]].drop_duplicates().head(args.limit).itertuples(index=False)
+
+    header = (
+        f"{'series':<32}{'point ms':>10}{'bands ms':>10}{'calib ms':>10}{'ratio':>8}{'scale':>7}{'raw':>6}{'calib':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    ratios, raw_coverages, coverages = [], [], []
+    for product_id, platform in series:
+        config = ForecastConfig(
+            csv_path=args.csv_path,
+            product_id=product_id,
+            platform=platform,
+            seq_len=args.seq_len,
+            epochs=args.epochs,
+            forecast_mode=args.forecast_mode,
+            max_horizon=args.future_days,
+            uncertainty_samples=args.samples,
+        )
+        series_df = df[(df["product_id"] == product_id) & (df["platform"] == platform)]
+        holdout = series_df["price"].to_numpy()[-args.future_days :]
+        try:
+            _, data_scaled, scaler = _prepare_series(series_df.iloc[: -args.future_days], config)
+        except ValueError:
+            continue
+        train_loader, test_loader = build_dataloaders(
+            data_scaled, config.seq_len, config.batch_size, horizon=config.output_size
+        )
+        model, _, _ = _fit_model(train_loader, test_loader, data_scaled.shape[1], config, "cpu")
+
+        _, point_ms = _timed(
+            lambda: _forecast(model, scaler, data_scaled, config, args.future_days, "cpu"), args.repeats
+        )
+        bands, bands_ms = _timed(
+            lambda: forecast_intervals(model, scaler, data_scaled, config, args.future_days, "cpu", args.samples),
+            args.repeats,
+        )
+        scale, calib_ms = _timed(
+            lambda: calibrate_interval_scale(
+                model, scaler, data_scaled, config, args.future_days, "cpu", args.samples
+            ),
+            args.repeats,
+        )
+        calibrated = scale_intervals(bands, scale)
+        raw_coverage = float(np.mean((holdout >= bands["p10"]) & (holdout <= bands["p90"])))
+        coverage = float(np.mean((holdout >= calibrated["p10"]) & (holdout <= calibrated["p90"])))
+        ratios.append((bands_ms + calib_ms) / point_ms)
+        raw_coverages.append(raw_coverage)
+        coverages.append(coverage)
+        print(
+            f"{product_id + '/' + platform:<32}{point_ms:>10.2f}{bands_ms:>10.2f}{calib_ms:>10.2f}"
+            f"{(bands_ms + calib_ms) / point_ms:>8.2f}{scale:>7.2f}{raw_coverage:>6.0%}{coverage:>7.0%}"
+        )
+
+    if ratios:
+        print(
+            f"Trung bình: (bands + calib)/point = {np.mean(ratios):.2f}x, coverage p10-p90 "
+            f"raw = {np.mean(raw_coverages):.0%}, calibrated = {np.mean(coverages):.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,14 @@ Có thể import để tái sử dụng hoặc chạy trực tiếp để thử
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Sequence, Tuple
+from typing import Callable, Dict, Optional, Sequence, Tuple
 
+# Mặc định 1 thread; models.cpu_allocator nới số thread torch theo số job train đang chạy.
 os.environ.setdefault("OMP_NUM_THREADS", "1")
 os.environ.setdefault("MKL_NUM_THREADS", "1")
 os.environ.setdefault("NUMEXPR_NUM_THREADS", "1")
@@ -25,9 +28,20 @@ from torch.utils.data import DataLoader, Dataset
 
 
 class PriceLSTM(nn.Module):
-    """Mạng LSTM đơn giản dự báo giá dựa trên chuỗi thời gian."""
-
-    def __init__(self, num_features: int, hidden_size: int = 64, num_layers: int = 1) -> None:
+    """
+    Mạng LSTM đơn giản dự báo giá dựa trên chuỗi thời gian.
+    output_size > 1 cho biến thể direct: dự báo cả horizon trong một lần forward.
+    dropout > 0 thêm Dropout trước lớp fc, dùng cho MC dropout khi ước lượng khoảng dự báo.
+    """
+
+    def __init__(
+        self,
+        num_features: int,
+        hidden_size: int = 64,
+        num_layers: int = 1,
+        output_size: int = 1,
+        dropout: float = 0.0,
+    ) -> None:
         super().__init__()
         self.lstm = nn.LSTM(
             input_size=num_features,
@@ -35,20 +49,26 @@ class PriceLSTM(nn.Module):
             num_layers=num_layers,
             batch_first=True,
         )
-        self.fc = nn.Linear(hidden_size, 1)
+        self.dropout = nn.Dropout(dropout)
+        self.fc = nn.Linear(hidden_size, output_size)
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         out, _ = self.lstm(x)
         out = out[:, -1, :]
+        out = self.dropout(out)
         out = self.fc(out)
         return out
 
 
-def create_windows(data_scaled: np.ndarray, seq_len: int) -> Tuple[np.ndarray, np.ndarray]:
+def create_windows(data_scaled: np.ndarray, seq_len: int, horizon: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """horizon > 1 trả về target dạng (N, horizon): giá của `horizon` ngày liền sau mỗi cửa sổ."""
     X, y = [], []
-    for idx in range(len(data_scaled) - seq_len):
+    for idx in range(len(data_scaled) - seq_len - horizon + 1):
         window = data_scaled[idx : idx + seq_len]
-        target_price = data_scaled[idx + seq_len][0]
+        if horizon == 1:
+            target_price = data_scaled[idx + seq_len][0]
+        else:
+            target_price = data_scaled[idx + seq_len : idx + seq_len + horizon, 0]
         X.append(window)
         y.append(target_price)
     return np.array(X, dtype=np.float32), np.array(y, dtype=np.float32)
@@ -70,14 +90,23 @@ def build_dataloaders(
     data_scaled: np.ndarray,
     seq_len: int,
     batch_size: int,
+    horizon: int = 1,
 ) -> Tuple[DataLoader, DataLoader]:
-    X, y = create_windows(data_scaled, seq_len)
+    X, y = create_windows(data_scaled, seq_len, horizon)
+    return loaders_from_windows(X, y, batch_size)
+
+
+def _train_size(num_windows: int) -> int:
+    train_size = max(1, int(num_windows * 0.8))
+    return train_size - 1 if train_size == num_windows else train_size
+
+
+def loaders_from_windows(X: np.ndarray, y: np.ndarray, batch_size: int) -> Tuple[DataLoader, DataLoader]:
+    """Chia các cửa sổ đã tạo sẵn thành train/test 80/20 theo thời gian."""
     if len(X) < 2:
         raise ValueError("Không đủ dữ liệu để tạo tập train/test. Hãy giảm seq_len hoặc thu thập thêm dữ liệu.")
 
-    train_size = max(1, int(len(X) * 0.8))
-    if train_size == len(X):
-        train_size -= 1
+    train_size = _train_size(len(X))
     X_train, X_test = X[:train_size], X[train_size:]
     y_train, y_test = y[:train_size], y[train_size:]
 
@@ -89,6 +118,12 @@ def build_dataloaders(
     return train_loader, test_loader
 
 
+DEFAULT_MC_DROPOUT = 0.1
+INTERVAL_QUANTILES = {"p10": 10, "p50": 50, "p90": 90}
+# Tỉ lệ giá thật mà khoảng p10-p90 (sau hiệu chỉnh) nhắm tới.
+INTERVAL_COVERAGE = 0.8
+
+
 @dataclass
 class ForecastConfig:
     csv_path: str
@@ -101,6 +136,25 @@ class ForecastConfig:
     feature_cols: Sequence[str] = ("price", "original_price", "is_promo", "stock")
     hidden_size: int = 64
     num_layers: int = 1
+    # "eager" | "torchscript" | "quantized" (TorchScript + dynamic int8 cho LSTM/Linear)
+    inference_backend: str = "eager"
+    artifact_dir: Optional[str] = None
+    # "autoregressive" (rollout từng ngày) | "direct" (một lần forward cho tối đa max_horizon ngày)
+    forecast_mode: str = "autoregressive"
+    max_horizon: int = 30
+    # uncertainty_samples > 0: trả thêm khoảng p10/p50/p90 từ MC dropout (N quỹ đạo trong một batch)
+    dropout: float = 0.0
+    uncertainty_samples: int = 0
+
+    @property
+    def effective_dropout(self) -> float:
+        if self.dropout or not self.uncertainty_samples:
+            return self.dropout
+        return DEFAULT_MC_DROPOUT
+
+    @property
+    def output_size(self) -> int:
+        return self.max_horizon if self.forecast_mode == "direct" else 1
 
 
 @dataclass
@@ -109,6 +163,7 @@ class ForecastResult:
     train_loss: float
     test_loss: float
     subset: pd.DataFrame
+    intervals: Optional[Dict[str, np.ndarray]] = None
 
 
 def _prepare_dataframe(config: ForecastConfig, df: Optional[pd.DataFrame]) -> pd.DataFrame:
@@ -120,24 +175,33 @@ def _prepare_dataframe(config: ForecastConfig, df: Optional[pd.DataFrame]) -> pd
     return df
 
 
+def _feature_matrix(subset: pd.DataFrame, config: ForecastConfig) -> np.ndarray:
+    feature_df = subset.reindex(columns=config.feature_cols, fill_value=0.0).copy()
+
+    feature_df["stock"] = feature_df["stock"].fillna(0)
+    feature_df["original_price"] = feature_df["original_price"].fillna(feature_df["price"])
+    feature_df["is_promo"] = feature_df["is_promo"].fillna(0)
+
+    return feature_df.values.astype(np.float32)
+
+
 def _prepare_series(
     df: pd.DataFrame,
     config: ForecastConfig,
+    scaler: Optional[MinMaxScaler] = None,
 ) -> Tuple[pd.DataFrame, np.ndarray, MinMaxScaler]:
+    """scaler đã fit (ví dụ lưu kèm artifact) thì chỉ transform, không fit lại trên dữ liệu mới."""
     subset = df[(df["product_id"] == config.product_id) & (df["platform"] == config.platform)].copy()
     subset = subset.sort_values("date")
     if len(subset) < config.seq_len + 5:
         raise ValueError("Dữ liệu hơi ít cho sản phẩm/sàn này. Hãy chọn sản phẩm khác hoặc giảm seq_len.")
 
-    feature_df = subset.reindex(columns=config.feature_cols, fill_value=0.0).copy()
-
-    feature_df["stock"] = feature_df["stock"].fillna(0)
-    feature_df["original_price"] = feature_df["original_price"].fillna(feature_df["price"])
-    feature_df["is_promo"] = feature_df["is_promo"].fillna(0)
-
-    data = feature_df.values.astype(np.float32)
-    scaler = MinMaxScaler()
-    data_scaled = scaler.fit_transform(data)
+    data = _feature_matrix(subset, config)
+    if scaler is None:
+        scaler = MinMaxScaler()
+        data_scaled = scaler.fit_transform(data)
+    else:
+        data_scaled = scaler.transform(data)
     return subset, data_scaled, scaler
 
 
@@ -147,18 +211,28 @@ def _fit_model(
     num_features: int,
     config: ForecastConfig,
     device: str,
+    epoch_callback: Optional[Callable[[int, float, float], bool]] = None,
 ) -> Tuple[PriceLSTM, float, float]:
-    model = PriceLSTM(num_features=num_features, hidden_size=config.hidden_size, num_layers=config.num_layers).to(device)
+    """epoch_callback(epoch, train_loss, test_loss) trả về True để dừng sớm (ví dụ khi tune bị prune)."""
+    model = PriceLSTM(
+        num_features=num_features,
+        hidden_size=config.hidden_size,
+        num_layers=config.num_layers,
+        output_size=config.output_size,
+        dropout=config.effective_dropout,
+    ).to(device)
     criterion = nn.MSELoss()
     optimizer = torch.optim.Adam(model.parameters(), lr=config.lr)
 
     last_train_loss, last_test_loss = 0.0, 0.0
-    for _ in range(config.epochs):
+    for epoch in range(config.epochs):
         model.train()
         running_train_loss = 0.0
         for xb, yb in train_loader:
             xb = xb.to(device)
-            yb = yb.to(device).unsqueeze(1)
+            yb = yb.to(device)
+            if yb.dim() == 1:
+                yb = yb.unsqueeze(1)
 
             optimizer.zero_grad()
             pred = model(xb)
@@ -175,17 +249,108 @@ def _fit_model(
         with torch.no_grad():
             for xb, yb in test_loader:
                 xb = xb.to(device)
-                yb = yb.to(device).unsqueeze(1)
+                yb = yb.to(device)
+                if yb.dim() == 1:
+                    yb = yb.unsqueeze(1)
                 pred = model(xb)
                 loss = criterion(pred, yb)
                 running_test_loss += loss.item() * xb.size(0)
         last_test_loss = running_test_loss / len(test_loader.dataset)
+        if epoch_callback is not None and epoch_callback(epoch, last_train_loss, last_test_loss):
+            break
 
     return model, last_train_loss, last_test_loss
 
 
-def forecast_future_prices(
+INFERENCE_BACKENDS = ("eager", "torchscript", "quantized")
+FORECAST_MODES = ("autoregressive", "direct")
+
+
+def compile_for_inference(
     model: PriceLSTM,
+    seq_len: int,
+    num_features: int,
+    quantize: bool = False,
+) -> torch.jit.ScriptModule:
+    """
+    Chuyển model đã train sang TorchScript (CPU) để rollout không đi qua Python eager.
+    quantize=True áp dụng quantize_dynamic (int8) cho các lớp LSTM/Linear trước khi trace.
+    """
+    model = model.to("cpu").eval()
+    if quantize:
+        model = torch.ao.quantization.quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+    example = torch.zeros(1, seq_len, num_features, dtype=torch.float32)
+    with torch.no_grad():
+        scripted = torch.jit.trace(model, example)
+    return torch.jit.freeze(scripted.eval())
+
+
+# Các trường quyết định kiến trúc/đầu vào của model; đổi một trường là phải dùng artifact khác.
+ARTIFACT_CONFIG_FIELDS = ("seq_len", "hidden_size", "num_layers", "feature_cols", "max_horizon", "dropout")
+SCALER_FILE = "scaler.json"
+
+
+def _config_hash(config: ForecastConfig) -> str:
+    params = {key: getattr(config, key) for key in ARTIFACT_CONFIG_FIELDS}
+    params["feature_cols"] = list(params["feature_cols"])
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def artifact_path(config: ForecastConfig) -> Optional[Path]:
+    if not config.artifact_dir:
+        return None
+    name = (
+        f"{config.product_id}__{config.platform}__{config.inference_backend}__{config.forecast_mode}"
+        f"__{_config_hash(config)}.pt"
+    )
+    return Path(config.artifact_dir) / name
+
+
+def _scaler_to_json(scaler: MinMaxScaler) -> str:
+    return json.dumps(
+        {
+            "feature_range": list(scaler.feature_range),
+            "data_min": scaler.data_min_.tolist(),
+            "data_max": scaler.data_max_.tolist(),
+        }
+    )
+
+
+def _scaler_from_json(text: str) -> MinMaxScaler:
+    data = json.loads(text)
+    scaler = MinMaxScaler(feature_range=tuple(data["feature_range"]))
+    # partial_fit trên hai dòng min/max khôi phục đúng min_/scale_ của scaler lúc train.
+    scaler.partial_fit(np.array([data["data_min"], data["data_max"]], dtype=np.float64))
+    return scaler
+
+
+def save_inference_artifact(
+    module: torch.jit.ScriptModule, path: str | Path, scaler: Optional[MinMaxScaler] = None
+) -> None:
+    """Lưu model TorchScript, kèm scaler đã fit lúc train (extra file) để dự báo không phải fit lại."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    extra_files = {SCALER_FILE: _scaler_to_json(scaler)} if scaler is not None else {}
+    torch.jit.save(module, str(path), _extra_files=extra_files)
+
+
+def load_inference_artifact(path: str | Path) -> Tuple[torch.jit.ScriptModule, Optional[MinMaxScaler]]:
+    extra_files = {SCALER_FILE: ""}
+    module = torch.jit.load(str(path), map_location="cpu", _extra_files=extra_files).eval()
+    scaler_json = extra_files[SCALER_FILE]
+    if isinstance(scaler_json, bytes):
+        scaler_json = scaler_json.decode("utf-8")
+    return module, _scaler_from_json(scaler_json) if scaler_json else None
+
+
+def _inverse_prices(scaler: MinMaxScaler, data_scaled: np.ndarray, predictions_scaled: Sequence[float]) -> np.ndarray:
+    predictions_full = np.repeat(data_scaled[-1:].copy(), len(predictions_scaled), axis=0)
+    predictions_full[:, 0] = predictions_scaled
+    return scaler.inverse_transform(predictions_full)[:, 0]
+
+
+def forecast_future_prices(
+    model: PriceLSTM | torch.jit.ScriptModule,
     scaler: MinMaxScaler,
     data_scaled: np.ndarray,
     seq_len: int,
@@ -207,14 +372,115 @@ def forecast_future_prices(
             next_row[0] = pred_scaled
             current_window = np.vstack([current_window[1:], next_row])
 
-    predictions_full = []
-    for pred in predictions_scaled:
-        row = data_scaled[-1].copy()
-        row[0] = pred
-        predictions_full.append(row)
-    predictions_full = np.array(predictions_full)
-    predictions_inversed = scaler.inverse_transform(predictions_full)[:, 0]
-    return predictions_inversed
+    return _inverse_prices(scaler, data_scaled, predictions_scaled)
+
+
+def forecast_direct(
+    model: PriceLSTM | torch.jit.ScriptModule,
+    scaler: MinMaxScaler,
+    data_scaled: np.ndarray,
+    seq_len: int,
+    future_days: int,
+    device: str,
+) -> np.ndarray:
+    """Dự báo cả horizon bằng một lần forward của model multi-output (forecast_mode="direct")."""
+    model.eval()
+    with torch.no_grad():
+        inp = torch.tensor(data_scaled[-seq_len:], dtype=torch.float32, device=device).unsqueeze(0)
+        outputs = model(inp).cpu().numpy()[0]
+    if future_days > len(outputs):
+        raise ValueError(f"Model direct chỉ dự báo tối đa {len(outputs)} ngày.")
+    return _inverse_prices(scaler, data_scaled, outputs[:future_days])
+
+
+def _forecast(
+    model: PriceLSTM | torch.jit.ScriptModule,
+    scaler: MinMaxScaler,
+    data_scaled: np.ndarray,
+    config: ForecastConfig,
+    future_days: int,
+    device: str,
+) -> np.ndarray:
+    if config.forecast_mode == "direct":
+        return forecast_direct(model, scaler, data_scaled, config.seq_len, future_days, device)
+    return forecast_future_prices(model, scaler, data_scaled, config.seq_len, future_days, device)
+
+
+def forecast_intervals(
+    model: PriceLSTM,
+    scaler: MinMaxScaler,
+    data_scaled: np.ndarray,
+    config: ForecastConfig,
+    future_days: int,
+    device: str,
+    samples: int,
+) -> Dict[str, np.ndarray]:
+    """
+    MC dropout: giữ Dropout bật khi suy luận và rollout `samples` quỹ đạo song song trong một batch tensor,
+    nên chi phí gần bằng một lần rollout điểm (mỗi bước là một forward với batch N thay vì 1).
+    """
+    model.eval()
+    for module in model.modules():
+        if isinstance(module, nn.Dropout):
+            module.train()
+
+    window = torch.tensor(data_scaled[-config.seq_len :], dtype=torch.float32, device=device)
+    windows = window.unsqueeze(0).repeat(samples, 1, 1)
+    with torch.no_grad():
+        if config.forecast_mode == "direct":
+            paths = model(windows)[:, :future_days]
+        else:
+            steps = []
+            for _ in range(future_days):
+                pred = model(windows)[:, 0]
+                steps.append(pred)
+                next_row = windows[:, -1:, :].clone()
+                next_row[:, 0, 0] = pred
+                windows = torch.cat([windows[:, 1:, :], next_row], dim=1)
+            paths = torch.stack(steps, dim=1)
+    model.eval()
+
+    # Đảo MinMaxScaler riêng cho cột giá, áp dụng cho cả ma trận (samples, future_days).
+    prices = (paths.cpu().numpy().astype(np.float64) - scaler.min_[0]) / scaler.scale_[0]
+    return {name: np.percentile(prices, q, axis=0) for name, q in INTERVAL_QUANTILES.items()}
+
+
+def calibrate_interval_scale(
+    model: PriceLSTM,
+    scaler: MinMaxScaler,
+    data_scaled: np.ndarray,
+    config: ForecastConfig,
+    future_days: int,
+    device: str,
+    samples: int,
+    origins: int = 5,
+) -> float:
+    """
+    Hệ số co/giãn khoảng p10-p90 quanh p50 để phủ INTERVAL_COVERAGE giá thật. Backtest từ tối đa `origins` điểm
+    gốc trong phần test (model chưa train trên các giá này), gộp mọi ngày có giá thật rồi lấy phân vị của
+    |giá thật - p50| / nửa độ rộng phía tương ứng.
+    """
+    num_windows = len(data_scaled) - config.seq_len - config.output_size + 1
+    first_unseen = _train_size(num_windows) + config.seq_len + config.output_size - 1
+    starts = np.unique(np.linspace(first_unseen, len(data_scaled) - 1, num=origins).astype(int))
+    ratios = []
+    for start in starts:
+        bands = forecast_intervals(model, scaler, data_scaled[:start], config, future_days, device, samples)
+        actual = (data_scaled[start : start + future_days, 0] - scaler.min_[0]) / scaler.scale_[0]
+        mid = bands["p50"][: len(actual)]
+        upper = np.maximum(bands["p90"][: len(actual)] - mid, 1e-9)
+        lower = np.maximum(mid - bands["p10"][: len(actual)], 1e-9)
+        ratios.extend(np.where(actual >= mid, (actual - mid) / upper, (mid - actual) / lower))
+    return float(np.quantile(ratios, INTERVAL_COVERAGE))
+
+
+def scale_intervals(intervals: Dict[str, np.ndarray], scale: float) -> Dict[str, np.ndarray]:
+    mid = intervals["p50"]
+    return {
+        "p10": mid - (mid - intervals["p10"]) * scale,
+        "p50": mid,
+        "p90": mid + (intervals["p90"] - mid) * scale,
+    }
 
 
 def train_and_predict(
@@ -222,11 +488,20 @@ def train_and_predict(
     future_days: int = 30,
     df: Optional[pd.DataFrame] = None,
     device: Optional[str] = None,
+    epoch_callback: Optional[Callable[[int, float, float], bool]] = None,
 ) -> ForecastResult:
+    if config.inference_backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"inference_backend không hợp lệ: {config.inference_backend}")
+    if config.forecast_mode not in FORECAST_MODES:
+        raise ValueError(f"forecast_mode không hợp lệ: {config.forecast_mode}")
+    if config.forecast_mode == "direct" and future_days > config.max_horizon:
+        raise ValueError(f"Chế độ direct chỉ hỗ trợ tối đa {config.max_horizon} ngày.")
     device = device or ("cuda" if torch.cuda.is_available() else "cpu")
     df_prepared = _prepare_dataframe(config, df)
     subset, data_scaled, scaler = _prepare_series(df_prepared, config)
-    train_loader, test_loader = build_dataloaders(data_scaled, config.seq_len, config.batch_size)
+    train_loader, test_loader = build_dataloaders(
+        data_scaled, config.seq_len, config.batch_size, horizon=config.output_size
+    )
 
     model, train_loss, test_loss = _fit_model(
         train_loader,
@@ -234,10 +509,62 @@ def train_and_predict(
         num_features=data_scaled.shape[1],
         config=config,
         device=device,
+        epoch_callback=epoch_callback,
+    )
+
+    intervals = None
+    if config.uncertainty_samples > 0:
+        # Tính trên model eager vì TorchScript đã đóng băng Dropout ở chế độ eval. Khoảng MC dropout thô thường
+        # quá hẹp nên được giãn theo backtest trên phần test trước khi trả về.
+        intervals = forecast_intervals(
+            model, scaler, data_scaled, config, future_days, device, config.uncertainty_samples
+        )
+        scale = calibrate_interval_scale(
+            model, scaler, data_scaled, config, future_days, device, config.uncertainty_samples
+        )
+        intervals = scale_intervals(intervals, scale)
+
+    if config.inference_backend != "eager":
+        model = compile_for_inference(
+            model,
+            config.seq_len,
+            data_scaled.shape[1],
+            quantize=config.inference_backend == "quantized",
+        )
+        device = "cpu"
+        path = artifact_path(config)
+        if path is not None:
+            save_inference_artifact(model, path, scaler)
+
+    predictions = _forecast(model, scaler, data_scaled, config, future_days, device)
+    return ForecastResult(
+        predictions=predictions,
+        train_loss=train_loss,
+        test_loss=test_loss,
+        subset=subset,
+        intervals=intervals,
     )
 
-    predictions = forecast_future_prices(model, scaler, data_scaled, config.seq_len, future_days, device)
-    return ForecastResult(predictions=predictions, train_loss=train_loss, test_loss=test_loss, subset=subset)
+
+def predict_from_artifact(
+    config: ForecastConfig,
+    future_days: int = 30,
+    df: Optional[pd.DataFrame] = None,
+) -> Optional[ForecastResult]:
+    """
+    Dự báo bằng artifact TorchScript đã lưu (không train lại), scale dữ liệu bằng scaler lưu kèm artifact.
+    Trả về None nếu chưa có artifact cho series/config này hoặc artifact không có scaler.
+    """
+    path = artifact_path(config)
+    if path is None or not path.exists():
+        return None
+    model, scaler = load_inference_artifact(path)
+    if scaler is None:
+        return None
+    df_prepared = _prepare_dataframe(config, df)
+    subset, data_scaled, scaler = _prepare_series(df_prepared, config, scaler)
+    predictions = _forecast(model, scaler, data_scaled, config, future_days, "cpu")
+    return ForecastResult(predictions=predictions, train_loss=float("nan"), test_loss=float("nan"), subset=subset)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+"""
+Backtest rolling-origin cho PriceLSTM: nhiều series x nhiều mốc cắt, chạy song song trên nhiều core.
+
+Mỗi series được scale và cắt cửa sổ một lần (scaler fit trên phần dữ liệu trước mốc cắt sớm nhất để
+không lộ thông tin tương lai); các fold chỉ lấy lát cửa sổ có target nằm trước mốc cắt của mình.
+
+Chạy: python -m models.backtest dataset/dataset.csv --folds 3 --horizon 7 --workers 4  (từ thư mục Final/)
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import torch
+from sklearn.preprocessing import MinMaxScaler
+
+from models.LSTM import (
+    ForecastConfig,
+    _feature_matrix,
+    _fit_model,
+    _forecast,
+    _prepare_dataframe,
+    create_windows,
+    loaders_from_windows,
+)
+
+
+@dataclass
+class FoldResult:
+    cutoff: str
+    mape: float
+    rmse: float
+    train_seconds: float
+
+
+@dataclass
+class SeriesBacktest:
+    product_id: str
+    platform: str
+    folds: List[FoldResult] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def mape(self) -> float:
+        return float(np.mean([fold.mape for fold in self.folds])) if self.folds else float("nan")
+
+    @property
+    def rmse(self) -> float:
+        return float(np.mean([fold.rmse for fold in self.folds])) if self.folds else float("nan")
+
+    @property
+    def train_seconds(self) -> float:
+        return float(sum(fold.train_seconds for fold in self.folds))
+
+
+@dataclass
+class CachedSeries:
+    """Dữ liệu đã scale + cửa sổ của một series, dùng chung cho mọi fold (và mọi trial khi tune)."""
+
+    dates: np.ndarray
+    prices: np.ndarray
+    data_scaled: np.ndarray
+    scaler: MinMaxScaler
+    X: np.ndarray
+    y: np.ndarray
+    cutoffs: List[int]
+
+
+def rolling_cutoffs(length: int, folds: int, horizon: int, step: Optional[int] = None) -> List[int]:
+    """Các mốc cắt (chỉ số dòng đầu tiên của phần test), fold cuối kết thúc đúng ở cuối series."""
+    step = step or horizon
+    return [length - horizon - step * k for k in reversed(range(folds))]
+
+
+def prepare_series_cache(
+    subset: pd.DataFrame,
+    config: ForecastConfig,
+    folds: int,
+    horizon: int,
+    step: Optional[int] = None,
+) -> CachedSeries:
+    subset = subset.sort_values("date")
+    cutoffs = rolling_cutoffs(len(subset), folds, horizon, step)
+    # Fold sớm nhất cần ít nhất 2 cửa sổ train, mỗi cửa sổ dài seq_len + output_size.
+    if cutoffs[0] < config.seq_len + config.output_size + 1:
+        raise ValueError("Dữ liệu quá ngắn cho số fold/seq_len đã chọn.")
+
+    features = _feature_matrix(subset, config)
+    scaler = MinMaxScaler().fit(features[: cutoffs[0]])
+    data_scaled = scaler.transform(features).astype(np.float32)
+    X, y = create_windows(data_scaled, config.seq_len, config.output_size)
+    return CachedSeries(
+        dates=subset["date"].to_numpy(),
+        prices=subset["price"].to_numpy(dtype=np.float64),
+        data_scaled=data_scaled,
+        scaler=scaler,
+        X=X,
+        y=y,
+        cutoffs=cutoffs,
+    )
+
+
+def _score(actual: np.ndarray, predicted: np.ndarray) -> Tuple[float, float]:
+    mask = actual != 0
+    mape = float(np.mean(np.abs((actual[mask] - predicted[mask]) / actual[mask])) * 100) if mask.any() else float("nan")
+    rmse = float(np.sqrt(np.mean((actual - predicted) ** 2)))
+    return mape, rmse
+
+
+def run_fold(
+    cache: CachedSeries,
+    cutoff: int,
+    config: ForecastConfig,
+    horizon: int,
+    epoch_callback: Optional[Callable[[int, float, float], bool]] = None,
+) -> FoldResult:
+    # Cửa sổ idx có target cuối ở dòng idx + seq_len + output_size - 1, phải nằm trước cutoff.
+    usable = cutoff - config.seq_len - config.output_size + 1
+    train_loader, test_loader = loaders_from_windows(cache.X[:usable], cache.y[:usable], config.batch_size)
+
+    # CPU time của process (không phải wall time) để so sánh công bằng khi nhiều worker tranh core.
+    start = time.process_time()
+    model, _, _ = _fit_model(
+        train_loader, test_loader, cache.data_scaled.shape[1], config, "cpu", epoch_callback=epoch_callback
+    )
+    train_seconds = time.process_time() - start
+
+    predictions = _forecast(model, cache.scaler, cache.data_scaled[:cutoff], config, horizon, "cpu")
+    mape, rmse = _score(cache.prices[cutoff : cutoff + horizon], np.asarray(predictions, dtype=np.float64))
+    return FoldResult(
+        cutoff=str(pd.Timestamp(cache.dates[cutoff]).date()),
+        mape=mape,
+        rmse=rmse,
+        train_seconds=train_seconds,
+    )
+
+
+def backtest_series(
+    subset: pd.DataFrame,
+    config: ForecastConfig,
+    folds: int = 3,
+    horizon: int = 7,
+    step: Optional[int] = None,
+) -> SeriesBacktest:
+    result = SeriesBacktest(product_id=config.product_id, platform=config.platform)
+    try:
+        cache = prepare_series_cache(subset, config, folds, horizon, step)
+        for cutoff in cache.cutoffs:
+            result.folds.append(run_fold(cache, cutoff, config, horizon))
+    except ValueError as e:
+        result.error = str(e)
+    return result
+
+
+def _worker_init() -> None:
+    # Mỗi process một thread để N process không tranh nhau core.
+    torch.set_num_threads(1)
+
+
+def _backtest_job(args: Tuple[pd.DataFrame, ForecastConfig, int, int, Optional[int]]) -> SeriesBacktest:
+    return backtest_series(*args)
+
+
+def run_backtest(
+    df: pd.DataFrame,
+    base_config: ForecastConfig,
+    series: Optional[Iterable[Tuple[str, str]]] = None,
+    folds: int = 3,
+    horizon: int = 7,
+    step: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> List[SeriesBacktest]:
+    df = _prepare_dataframe(base_config, df)
+    if series is None:
+        series = df[["product_id", "platform"]].drop_duplicates().itertuples(index=False, name=None)
+    grouped = df.groupby(["product_id", "platform"])
+    jobs = []
+    for product_id, platform in series:
+        config = replace(base_config, product_id=product_id, platform=platform)
+        jobs.append((grouped.get_group((product_id, platform)), config, folds, horizon, step))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _worker_init()
+        return [_backtest_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as pool:
+        return list(pool.map(_backtest_job, jobs))
+
+
+def summarize(results: Sequence[SeriesBacktest]) -> dict:
+    scored = [item for item in results if item.folds]
+    train_seconds = sum(item.train_seconds for item in scored)
+    mape = float(np.mean([item.mape for item in scored])) if scored else float("nan")
+    return {
+        "series": len(scored),
+        "skipped": len(results) - len(scored),
+        "mape": mape,
+        "rmse": float(np.mean([item.rmse for item in scored])) if scored else float("nan"),
+        "train_cpu_seconds": train_seconds,
+        # Độ chính xác (100 - MAPE) trên mỗi CPU-giây train: càng cao càng đáng tiền.
+        "accuracy_per_cpu_second": (100 - mape) / train_seconds if train_seconds else float("nan"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_path")
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--step", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=None, help="Chỉ backtest N series đầu tiên.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seq-len", type=int, default=120)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--num-layers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--forecast-mode", default="autoregressive")
+    args = parser.parse_args()
+
+    base_config = ForecastConfig(
+        csv_path=args.csv_path,
+        product_id="",
+        platform="",
+        seq_len=args.seq_len,
+        epochs=args.epochs,
+        hidden_size=args.hidden_size,
+        num_layers=args.num_layers,
+        batch_size=args.batch_size,
+        lr=args.lr,
+        forecast_mode=args.forecast_mode,
+        max_horizon=max(args.horizon, 1),
+    )
+    df = pd.read_csv(args.csv_path)
+    series = df[["product_id", "platform"]].drop_duplicates().itertuples(index=False, name=None)
+    if args.limit:
+        series = list(series)[: args.limit]
+
+    start = time.perf_counter()
+    results = run_backtest(df, base_config, series, args.folds, args.horizon, args.step, args.workers)
+    wall_seconds = time.perf_counter() - start
+
+    print(f"{'series':<32}{'MAPE%':>8}{'RMSE':>12}{'train s':>10}")
+    for item in results:
+        label = f"{item.product_id}/{item.platform}"
+        if item.error:
+            print(f"{label:<32}  bỏ qua: {item.error}")
+            continue
+        print(f"{label:<32}{item.mape:>8.3f}{item.rmse:>12.1f}{item.train_seconds:>10.2f}")
+    summary = summarize(results)
+    summary["wall_seconds"] = wall_seconds
+    print({key: round(value, 4) if isinstance(value, float) else value for key, value in summary.items()})
+    print("config:", {key: value for key, value in asdict(base_config).items() if key not in {"csv_path", "product_id", "platform"}})
+
+
+if __name__ == "__main__":
+    main()
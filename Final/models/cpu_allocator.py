@@ -0,0 +1,134 @@
+"""
+Chia core CPU cho các job train/dự báo chạy đồng thời trong cùng process.
+
+Với backend OpenMP, `torch.set_num_threads` chỉ đổi số thread của thread đang gọi (các thread khác giữ giá trị
+của mình; thread tạo sau có thể nhận giá trị mặc định vừa đặt). Vì vậy mỗi job tự đặt số thread cho chính thread
+đang train theo phần chia công bằng (số core / số job đang chạy) lúc bắt đầu và sau mỗi epoch, vì không job nào
+đổi được số thread của job khác: một request lẻ trên máy rảnh dùng hết core, khi tải cao mỗi job co về 1 thread.
+Khi job xong, thread đó được trả về số thread trước job.
+
+Biến môi trường:
+- FORECAST_CPU_CORES: số core dành cho dự báo (mặc định = số core process được phép chạy).
+- FORECAST_MAX_THREADS_PER_JOB: trần số thread của một job (mặc định không giới hạn).
+- FORECAST_PIN_CORES: đặt 1 để gắn job vào các core riêng (chỉ Linux, best effort): chỉ thread đang train và
+  các thread OpenMP nó tạo ra sau đó bị ghim; thread OpenMP đã có từ job trước giữ affinity cũ.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import torch
+
+
+def _available_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class CpuLease:
+    """Phần CPU của một job; gọi `refresh` ở ranh giới epoch để co/giãn theo tải hiện tại."""
+
+    def __init__(self, allocator: "CpuAllocator") -> None:
+        self.allocator = allocator
+        self.threads = 0
+        self.cores: List[int] = []
+
+    def refresh(self) -> int:
+        return self.allocator._apply(self)
+
+    def epoch_callback(self, epoch: int, train_loss: float, test_loss: float) -> bool:
+        """Dùng làm epoch_callback của _fit_model: cân lại thread, không bao giờ dừng sớm."""
+        self.refresh()
+        return False
+
+
+class CpuAllocator:
+    def __init__(
+        self,
+        cores: Optional[Sequence[int]] = None,
+        max_threads_per_job: Optional[int] = None,
+        pin: Optional[bool] = None,
+    ) -> None:
+        if cores is None:
+            cores = _available_cores()
+            limit = int(os.getenv("FORECAST_CPU_CORES", "0"))
+            if limit > 0:
+                cores = cores[:limit]
+        if max_threads_per_job is None:
+            max_threads_per_job = int(os.getenv("FORECAST_MAX_THREADS_PER_JOB", "0"))
+        if pin is None:
+            pin = os.getenv("FORECAST_PIN_CORES", "").lower() in {"1", "true", "on"}
+        self.cores = list(cores) or [0]
+        self.max_threads_per_job = max_threads_per_job or len(self.cores)
+        self.pin = pin and hasattr(os, "sched_setaffinity")
+        self._leases: Dict[int, CpuLease] = {}
+        self._free = set(self.cores)
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._leases)
+
+    def fair_share(self) -> int:
+        return max(1, min(self.max_threads_per_job, len(self.cores) // max(1, len(self._leases))))
+
+    def _apply(self, lease: CpuLease) -> int:
+        with self._lock:
+            target = self.fair_share()
+            if self.pin:
+                # Trả bớt core khi phần chia nhỏ lại, nhận thêm core rảnh khi job khác đã xong.
+                while len(lease.cores) > target:
+                    self._free.add(lease.cores.pop())
+                while len(lease.cores) < target and self._free:
+                    lease.cores.append(min(self._free))
+                    self._free.discard(lease.cores[-1])
+                # Hết core rảnh thì vẫn chạy (1 thread) nhưng không ghim để khỏi dồn vào một core.
+                target = max(1, len(lease.cores))
+            lease.threads = target
+            cores = list(lease.cores)
+        # Chỉ có tác dụng với thread đang gọi, nên _apply phải chạy trên thread train của job (job()/epoch_callback).
+        if torch.get_num_threads() != target:
+            torch.set_num_threads(target)
+        if self.pin:
+            # pid 0 = thread đang gọi trên Linux; thread OpenMP tạo sau đó kế thừa affinity này,
+            # thread OpenMP đã tồn tại thì không.
+            os.sched_setaffinity(0, cores or self.cores)
+        return target
+
+    @contextlib.contextmanager
+    def job(self) -> Iterator[CpuLease]:
+        lease = CpuLease(self)
+        previous_threads = torch.get_num_threads()
+        previous_affinity = os.sched_getaffinity(0) if self.pin else None
+        with self._lock:
+            self._leases[id(lease)] = lease
+        try:
+            lease.refresh()
+            yield lease
+        finally:
+            with self._lock:
+                self._leases.pop(id(lease), None)
+                self._free.update(lease.cores)
+                lease.cores = []
+            # Job còn lại tự nới thread ở epoch kế tiếp; thread này trở về số thread trước job.
+            torch.set_num_threads(previous_threads)
+            if previous_affinity is not None:
+                os.sched_setaffinity(0, previous_affinity)
+
+
+_ALLOCATOR: Optional[CpuAllocator] = None
+_ALLOCATOR_LOCK = threading.Lock()
+
+
+def get_allocator() -> CpuAllocator:
+    """Allocator dùng chung cho cả process: core là tài nguyên chung của mọi thread train."""
+    global _ALLOCATOR
+    with _ALLOCATOR_LOCK:
+        if _ALLOCATOR is None:
+            _ALLOCATOR = CpuAllocator()
+        return _ALLOCATOR
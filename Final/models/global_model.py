@@ -0,0 +1,267 @@
+"""
+Model global dùng chung cho mọi series: một LSTM train một lần trên toàn catalog, kèm embedding cho
+product_id, platform, brand và category.
+
+- Giá được đưa về log(giá / giá cuối cửa sổ) nên một model phục vụ được mọi khoảng giá.
+- Khi train, một phần cửa sổ bị cắt ngắn (che phần đầu bằng mask) và một phần product_id bị thay bằng
+  "unknown", nên series ngắn và SKU mới vẫn dự báo được nhờ embedding brand/category/platform.
+- Đầu ra direct cho tối đa max_horizon ngày: mỗi request chỉ là một lần forward, không train.
+
+Chạy: python -m models.global_model dataset/dataset.csv --epochs 5  (từ thư mục Final/)
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+
+EMBEDDING_KEYS = ("product_id", "platform", "brand", "category")
+# log giá tương đối, is_promo, mask (1 = ngày có dữ liệu, 0 = phần đệm của series ngắn)
+NUM_INPUTS = 3
+UNKNOWN = 0
+
+
+@dataclass
+class GlobalModelConfig:
+    seq_len: int = 60
+    max_horizon: int = 30
+    hidden_size: int = 64
+    embedding_dim: int = 8
+    batch_size: int = 256
+    epochs: int = 5
+    lr: float = 3e-3
+    stride: int = 1
+    # Tỉ lệ cửa sổ bị cắt ngắn và tỉ lệ product_id bị che khi train (cho series ngắn / SKU mới).
+    truncate_rate: float = 0.2
+    unknown_product_rate: float = 0.1
+    seed: int = 0
+
+
+class GlobalPriceLSTM(nn.Module):
+    def __init__(self, vocab_sizes: Dict[str, int], config: GlobalModelConfig) -> None:
+        super().__init__()
+        self.embeddings = nn.ModuleDict(
+            {key: nn.Embedding(vocab_sizes[key], config.embedding_dim) for key in EMBEDDING_KEYS}
+        )
+        self.lstm = nn.LSTM(NUM_INPUTS, config.hidden_size, batch_first=True)
+        joint = config.hidden_size + config.embedding_dim * len(EMBEDDING_KEYS)
+        self.head = nn.Sequential(
+            nn.Linear(joint, config.hidden_size),
+            nn.ReLU(),
+            nn.Linear(config.hidden_size, config.max_horizon),
+        )
+
+    def forward(self, x: torch.Tensor, ids: torch.Tensor) -> torch.Tensor:
+        _, (h, _) = self.lstm(x)
+        embedded = [self.embeddings[key](ids[:, idx]) for idx, key in enumerate(EMBEDDING_KEYS)]
+        return self.head(torch.cat([h[-1], *embedded], dim=1))
+
+
+def _build_vocab(values: pd.Series) -> Dict[str, int]:
+    return {value: idx for idx, value in enumerate(sorted(values.dropna().astype(str).unique()), start=1)}
+
+
+def _series_meta(df: pd.DataFrame) -> pd.DataFrame:
+    meta = df.groupby(["product_id", "platform"], sort=False).first().reset_index()
+    for key in ("brand", "category"):
+        if key not in meta.columns:
+            meta[key] = None
+    return meta[list(EMBEDDING_KEYS)]
+
+
+def _encode_inputs(prices: np.ndarray, promo: np.ndarray, seq_len: int) -> np.ndarray:
+    """Cửa sổ cuối (đệm bên trái nếu series ngắn hơn seq_len) -> mảng [seq_len, NUM_INPUTS]."""
+    prices, promo = prices[-seq_len:], promo[-seq_len:]
+    x = np.zeros((seq_len, NUM_INPUTS), dtype=np.float32)
+    observed = len(prices)
+    x[-observed:, 0] = np.log(prices / prices[-1])
+    x[-observed:, 1] = promo
+    x[-observed:, 2] = 1.0
+    return x
+
+
+class GlobalForecaster:
+    def __init__(self, config: Optional[GlobalModelConfig] = None) -> None:
+        self.config = config or GlobalModelConfig()
+        self.vocab: Dict[str, Dict[str, int]] = {}
+        self.model: Optional[GlobalPriceLSTM] = None
+        self.train_seconds = 0.0
+
+    def _ids(self, meta: Dict[str, Any]) -> np.ndarray:
+        ids = []
+        for key in EMBEDDING_KEYS:
+            value = meta.get(key)
+            ids.append(UNKNOWN if value is None or pd.isna(value) else self.vocab[key].get(str(value), UNKNOWN))
+        return np.array(ids, dtype=np.int64)
+
+    def _training_windows(self, df: pd.DataFrame, rng: np.random.Generator) -> Tuple[np.ndarray, ...]:
+        config = self.config
+        span = config.seq_len + config.max_horizon
+        xs, ys, ids = [], [], []
+        for _, group in df.groupby(["product_id", "platform"], sort=False):
+            prices = group["price"].to_numpy(dtype=np.float64)
+            if len(prices) < span:
+                continue
+            promo = np.zeros(len(prices), dtype=np.float32)
+            if "is_promo" in group.columns:
+                promo = group["is_promo"].fillna(0).to_numpy(dtype=np.float32)
+            # Giá NaN/inf/<= 0 thành NaN sau log; bỏ mọi cửa sổ chứa chúng để loss không bị NaN.
+            with np.errstate(divide="ignore", invalid="ignore"):
+                log_all = np.log(np.where(np.isfinite(prices) & (prices > 0), prices, np.nan))
+            log_prices = np.lib.stride_tricks.sliding_window_view(log_all, span)[:: config.stride]
+            promo_windows = np.lib.stride_tricks.sliding_window_view(promo, span)[:: config.stride]
+            valid = np.isfinite(log_prices).all(axis=1)
+            if not valid.any():
+                continue
+            log_prices, promo_windows = log_prices[valid], promo_windows[valid]
+            anchor = log_prices[:, config.seq_len - 1 : config.seq_len]
+
+            x = np.zeros((len(log_prices), config.seq_len, NUM_INPUTS), dtype=np.float32)
+            x[:, :, 0] = log_prices[:, : config.seq_len] - anchor
+            x[:, :, 1] = promo_windows[:, : config.seq_len]
+            x[:, :, 2] = 1.0
+            ys.append((log_prices[:, config.seq_len :] - anchor).astype(np.float32))
+            xs.append(x)
+            meta = group.iloc[0].to_dict()
+            ids.append(np.repeat(self._ids(meta)[None, :], len(x), axis=0))
+
+        if not xs:
+            raise ValueError(f"Không có series nào đủ {span} ngày để train model global.")
+        X, y, I = np.concatenate(xs), np.concatenate(ys), np.concatenate(ids)
+
+        # Che phần đầu của một số cửa sổ để model quen với series mới chỉ có vài ngày dữ liệu.
+        truncated = np.flatnonzero(rng.random(len(X)) < config.truncate_rate)
+        keep = rng.integers(1, config.seq_len, size=len(truncated))
+        for idx, observed in zip(truncated, keep):
+            X[idx, : config.seq_len - observed] = 0.0
+        return X, y, I
+
+    def fit(self, df: pd.DataFrame) -> "GlobalForecaster":
+        """df cần product_id, platform, date, price; brand/category/is_promo nếu có sẽ được dùng."""
+        config = self.config
+        rng = np.random.default_rng(config.seed)
+        torch.manual_seed(config.seed)
+        df = df.sort_values("date", kind="mergesort")
+        meta = _series_meta(df)
+        self.vocab = {key: _build_vocab(meta[key]) for key in EMBEDDING_KEYS}
+
+        start = time.perf_counter()
+        X, y, I = self._training_windows(df, rng)
+        self.model = GlobalPriceLSTM({key: len(self.vocab[key]) + 1 for key in EMBEDDING_KEYS}, config)
+        loader = DataLoader(
+            TensorDataset(torch.from_numpy(X), torch.from_numpy(I), torch.from_numpy(y)),
+            batch_size=config.batch_size,
+            shuffle=True,
+        )
+        optimizer = torch.optim.Adam(self.model.parameters(), lr=config.lr)
+        criterion = nn.MSELoss()
+        self.model.train()
+        for _ in range(config.epochs):
+            for xb, ib, yb in loader:
+                # Thay product_id bằng "unknown" để embedding này học được mức trung bình cho SKU mới.
+                ib = ib.clone()
+                ib[torch.rand(len(ib)) < config.unknown_product_rate, 0] = UNKNOWN
+                optimizer.zero_grad()
+                loss = criterion(self.model(xb, ib), yb)
+                loss.backward()
+                optimizer.step()
+        self.model.eval()
+        self.train_seconds = time.perf_counter() - start
+        return self
+
+    def predict(
+        self,
+        prices: Sequence[float],
+        meta: Dict[str, Any],
+        future_days: int,
+        promo: Optional[Sequence[float]] = None,
+    ) -> np.ndarray:
+        """
+        prices: lịch sử giá của series (ít nhất 1 ngày, càng dài càng tốt tới seq_len).
+        meta: product_id/platform/brand/category; giá trị chưa gặp khi train dùng embedding "unknown".
+        """
+        if self.model is None:
+            raise ValueError("Model global chưa được train hoặc nạp.")
+        if future_days > self.config.max_horizon:
+            raise ValueError(f"Model global chỉ hỗ trợ tối đa {self.config.max_horizon} ngày.")
+        prices = np.asarray(prices, dtype=np.float64)
+        observed = np.isfinite(prices) & (prices > 0)
+        if not observed.any():
+            raise ValueError("Cần ít nhất một giá hợp lệ để dự báo.")
+        promo = np.zeros(len(prices)) if promo is None else np.asarray(promo, dtype=np.float64)[-len(prices) :]
+        prices, promo = prices[observed], np.nan_to_num(promo)[observed]
+
+        x = torch.from_numpy(_encode_inputs(prices, promo, self.config.seq_len))[None]
+        ids = torch.from_numpy(self._ids(meta))[None]
+        with torch.no_grad():
+            log_ratio = self.model(x, ids)[0, :future_days].numpy()
+        predictions = prices[-1] * np.exp(log_ratio)
+        if not np.isfinite(predictions).all():
+            raise ValueError("Model global trả về giá trị không hợp lệ (NaN/inf).")
+        return predictions
+
+    def save(self, path: str | Path) -> None:
+        if self.model is None:
+            raise ValueError("Model global chưa được train.")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        torch.save(
+            {
+                "config": asdict(self.config),
+                "vocab": self.vocab,
+                "state_dict": self.model.state_dict(),
+                "train_seconds": self.train_seconds,
+            },
+            path,
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "GlobalForecaster":
+        data = torch.load(path, map_location="cpu", weights_only=False)
+        forecaster = cls(GlobalModelConfig(**data["config"]))
+        forecaster.vocab = data["vocab"]
+        forecaster.train_seconds = data.get("train_seconds", 0.0)
+        forecaster.model = GlobalPriceLSTM({key: len(forecaster.vocab[key]) + 1 for key in EMBEDDING_KEYS}, forecaster.config)
+        forecaster.model.load_state_dict(data["state_dict"])
+        forecaster.model.eval()
+        return forecaster
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_path")
+    parser.add_argument("--products", default=None, help="products.csv (mặc định cạnh csv_path).")
+    parser.add_argument("--output", default=None, help="Mặc định: global_model.pt cạnh csv_path.")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--seq-len", type=int, default=60)
+    parser.add_argument("--max-horizon", type=int, default=30)
+    parser.add_argument("--stride", type=int, default=1)
+    args = parser.parse_args()
+
+    csv_path = Path(args.csv_path)
+    df = pd.read_csv(csv_path, parse_dates=["date"])
+    products_path = Path(args.products) if args.products else csv_path.parent / "products.csv"
+    if products_path.exists() and "brand" not in df.columns:
+        df = df.merge(pd.read_csv(products_path)[["product_id", "brand", "category"]], on="product_id", how="left")
+
+    config = GlobalModelConfig(
+        seq_len=args.seq_len, max_horizon=args.max_horizon, epochs=args.epochs, stride=args.stride
+    )
+    forecaster = GlobalForecaster(config).fit(df)
+    output = Path(args.output) if args.output else csv_path.parent / "global_model.pt"
+    forecaster.save(output)
+    print(f"Đã train model global trên {df.groupby(['product_id', 'platform']).ngroups} series "
+          f"trong {forecaster.train_seconds:.1f}s, lưu tại {output}")
+
+
+if __name__ == "__main__":
+    main()
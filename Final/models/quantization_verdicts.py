@@ -0,0 +1,41 @@
+"""
+Đọc/ghi quantization_verdicts.json: backend suy luận chọn cho từng series bởi benchmarks/quantization_report.py
+("quantized" khi int8 nhanh hơn mà MAPE tăng không đáng kể, ngược lại "torchscript").
+
+Định dạng: {product_id: {platform: backend}}. Module này không import torch để ProductAnalyticsService đọc được
+file mà không nạp stack mô hình.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict
+
+# Chỉ các backend đã được so sánh trong báo cáo.
+VERDICT_BACKENDS = ("torchscript", "quantized")
+
+
+def load_quantization_verdicts(path: str | Path) -> Dict[str, Dict[str, str]]:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        product_id: {platform: backend for platform, backend in platforms.items() if backend in VERDICT_BACKENDS}
+        for product_id, platforms in data.items()
+        if isinstance(platforms, dict)
+    }
+
+
+def save_quantization_verdicts(path: str | Path, verdicts: Dict[str, Dict[str, str]]) -> None:
+    path = Path(path)
+    merged = load_quantization_verdicts(path)
+    for product_id, platforms in verdicts.items():
+        merged.setdefault(product_id, {}).update(platforms)
+    path.write_text(json.dumps(merged, indent=2, ensure_ascii=False), encoding="utf-8")
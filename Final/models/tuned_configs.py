@@ -0,0 +1,38 @@
+"""
+Đọc/ghi tuned_configs.json (config tốt nhất theo category do `python -m models.tuning` tìm ra).
+
+Module này không import torch để ProductAnalyticsService đọc được file mà không nạp stack mô hình.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+# Các trường ForecastConfig được phép override theo category.
+TUNABLE_FIELDS = ("seq_len", "hidden_size", "num_layers", "lr", "batch_size", "epochs")
+
+
+def load_tuned_configs(path: str | Path) -> Dict[str, Dict[str, Any]]:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        category: {key: value for key, value in params.items() if key in TUNABLE_FIELDS}
+        for category, params in data.items()
+        if isinstance(params, dict)
+    }
+
+
+def save_tuned_configs(path: str | Path, best: Dict[str, Dict[str, Any]]) -> None:
+    path = Path(path)
+    merged = load_tuned_configs(path)
+    merged.update(best)
+    path.write_text(json.dumps(merged, indent=2, ensure_ascii=False), encoding="utf-8")
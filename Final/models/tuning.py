@@ -0,0 +1,267 @@
+"""
+Tìm hyperparameter cho ForecastConfig theo từng category (grid / random / successive halving).
+
+- Mỗi worker nhận dữ liệu các series của category một lần (initializer) và cache dữ liệu đã scale + cửa sổ
+  theo (series, seq_len), nên các trial cùng seq_len không phải tiền xử lý lại.
+- Trial bị prune khi val loss ở một epoch tệ hơn trung vị các trial đã xong tại cùng epoch quá `tolerance`.
+- Config tốt nhất của mỗi category được ghi vào JSON mà ProductAnalyticsService đọc khi dự báo.
+
+Chạy: python -m models.tuning dataset/dataset.csv --strategy halving --trials 12 --workers 4  (từ thư mục Final/)
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import torch
+
+from models.LSTM import ForecastConfig, _prepare_dataframe
+from models.backtest import CachedSeries, prepare_series_cache, run_fold
+from models.tuned_configs import save_tuned_configs
+
+SEARCH_STRATEGIES = ("grid", "random", "halving")
+
+DEFAULT_SPACE: Dict[str, List[Any]] = {
+    "seq_len": [60, 90, 120],
+    "hidden_size": [32, 64, 128],
+    "num_layers": [1, 2],
+    "lr": [1e-3, 3e-3],
+    "batch_size": [32, 64],
+}
+
+
+@dataclass
+class TrialResult:
+    params: Dict[str, Any]
+    epochs: int
+    mape: float = float("inf")
+    train_seconds: float = 0.0
+    pruned: bool = False
+    # (chỉ số series, epoch) -> val loss, dùng để tính đường trung vị cho việc prune.
+    curve: Dict[Tuple[int, int], float] = field(default_factory=dict)
+
+
+def grid_candidates(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def random_candidates(space: Dict[str, Sequence[Any]], n_trials: int, seed: int = 0) -> List[Dict[str, Any]]:
+    grid = grid_candidates(space)
+    random.Random(seed).shuffle(grid)
+    return grid[:n_trials]
+
+
+_SERIES: List[pd.DataFrame] = []
+_CACHE: Dict[Tuple[int, int, int], CachedSeries] = {}
+
+
+def _worker_init(frames: List[pd.DataFrame]) -> None:
+    torch.set_num_threads(1)
+    _SERIES[:] = frames
+    _CACHE.clear()
+
+
+def _cached_series(idx: int, config: ForecastConfig, horizon: int) -> CachedSeries:
+    key = (idx, config.seq_len, config.output_size)
+    if key not in _CACHE:
+        _CACHE[key] = prepare_series_cache(_SERIES[idx], config, folds=1, horizon=horizon)
+    return _CACHE[key]
+
+
+def _run_trial(
+    params: Dict[str, Any],
+    epochs: int,
+    base_config: ForecastConfig,
+    horizon: int,
+    median_curve: Dict[Tuple[int, int], float],
+    min_epochs: int,
+    tolerance: float,
+) -> TrialResult:
+    config = replace(base_config, **{**params, "epochs": epochs})
+    result = TrialResult(params=params, epochs=epochs)
+    mapes: List[float] = []
+
+    for idx in range(len(_SERIES)):
+        try:
+            cache = _cached_series(idx, config, horizon)
+        except ValueError:
+            continue
+
+        def on_epoch(epoch: int, train_loss: float, test_loss: float, idx: int = idx) -> bool:
+            result.curve[(idx, epoch)] = test_loss
+            reference = median_curve.get((idx, epoch))
+            if epoch + 1 >= min_epochs and reference is not None and test_loss > reference * (1 + tolerance):
+                result.pruned = True
+            return result.pruned
+
+        fold = run_fold(cache, cache.cutoffs[-1], config, horizon, epoch_callback=on_epoch)
+        result.train_seconds += fold.train_seconds
+        if result.pruned:
+            return result
+        mapes.append(fold.mape)
+
+    if mapes:
+        result.mape = float(np.mean(mapes))
+    return result
+
+
+def _median_curve(results: Sequence[TrialResult]) -> Dict[Tuple[int, int], float]:
+    values: Dict[Tuple[int, int], List[float]] = {}
+    for item in results:
+        if item.pruned:
+            continue
+        for key, loss in item.curve.items():
+            values.setdefault(key, []).append(loss)
+    return {key: float(np.median(losses)) for key, losses in values.items()}
+
+
+def _run_round(
+    pool: ProcessPoolExecutor,
+    candidates: Sequence[Dict[str, Any]],
+    epochs: int,
+    base_config: ForecastConfig,
+    horizon: int,
+    workers: int,
+    min_epochs: int,
+    tolerance: float,
+) -> List[TrialResult]:
+    """Chạy các trial với tối đa `workers` trial cùng lúc, trial sau được prune theo các trial đã xong."""
+    pending = list(candidates)
+    in_flight = set()
+    done: List[TrialResult] = []
+    while pending or in_flight:
+        while pending and len(in_flight) < workers:
+            params = pending.pop(0)
+            curve = _median_curve(done)
+            in_flight.add(
+                pool.submit(_run_trial, params, epochs, base_config, horizon, curve, min_epochs, tolerance)
+            )
+        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        done.extend(future.result() for future in finished)
+    return done
+
+
+def _category_frames(df: pd.DataFrame, category: str, limit: int) -> List[pd.DataFrame]:
+    subset = df[df["category"] == category]
+    sizes = subset.groupby(["product_id", "platform"]).size().sort_values(ascending=False)
+    grouped = subset.groupby(["product_id", "platform"])
+    return [grouped.get_group(key) for key in sizes.index[:limit]]
+
+
+def search_category(
+    df: pd.DataFrame,
+    category: str,
+    base_config: ForecastConfig,
+    space: Optional[Dict[str, Sequence[Any]]] = None,
+    strategy: str = "random",
+    n_trials: int = 12,
+    max_epochs: int = 20,
+    series_per_category: int = 4,
+    horizon: int = 7,
+    workers: Optional[int] = None,
+    min_epochs: int = 3,
+    tolerance: float = 0.25,
+    eta: int = 3,
+    seed: int = 0,
+) -> List[TrialResult]:
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"strategy không hợp lệ: {strategy}")
+    space = space or DEFAULT_SPACE
+    candidates = grid_candidates(space) if strategy == "grid" else random_candidates(space, n_trials, seed)
+    frames = _category_frames(df, category, series_per_category)
+    if not frames:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    results: List[TrialResult] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, initargs=(frames,)) as pool:
+        if strategy != "halving":
+            return _run_round(pool, candidates, max_epochs, base_config, horizon, workers, min_epochs, tolerance)
+
+        # Successive halving: mỗi vòng giữ 1/eta candidate tốt nhất và nhân ngân sách epoch lên eta lần.
+        rounds = max(1, int(math.log(max(len(candidates), 1), eta)) + 1)
+        for round_idx in range(rounds):
+            epochs = max(1, int(max_epochs / eta ** (rounds - 1 - round_idx)))
+            round_results = _run_round(pool, candidates, epochs, base_config, horizon, workers, min_epochs, tolerance)
+            results.extend(round_results)
+            survivors = sorted((item for item in round_results if not item.pruned), key=lambda item: item.mape)
+            # Candidate còn lại vẫn đi tiếp tới vòng cuối để được đánh giá ở ngân sách max_epochs.
+            candidates = [item.params for item in survivors[: max(1, len(survivors) // eta)]]
+            if not candidates:
+                break
+    return results
+
+
+def best_trial(results: Sequence[TrialResult]) -> Optional[TrialResult]:
+    scored = [item for item in results if not item.pruned and math.isfinite(item.mape)]
+    if not scored:
+        return None
+    # Ưu tiên trial ở ngân sách epoch lớn nhất (vòng cuối của halving), sau đó MAPE thấp nhất.
+    return min(scored, key=lambda item: (-item.epochs, item.mape))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_path")
+    parser.add_argument("--strategy", choices=SEARCH_STRATEGIES, default="halving")
+    parser.add_argument("--trials", type=int, default=12)
+    parser.add_argument("--max-epochs", type=int, default=20)
+    parser.add_argument("--categories", default=None, help="Danh sách category, phân cách bởi dấu phẩy.")
+    parser.add_argument("--products", default=None, help="products.csv (mặc định cạnh csv_path).")
+    parser.add_argument("--series-per-category", type=int, default=4)
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Mặc định: tuned_configs.json cạnh csv_path.")
+    args = parser.parse_args()
+
+    csv_path = Path(args.csv_path)
+    df = _prepare_dataframe(ForecastConfig(csv_path=str(csv_path), product_id="", platform=""), pd.read_csv(csv_path))
+    if "category" not in df.columns:
+        products = pd.read_csv(args.products or csv_path.parent / "products.csv")
+        df = df.merge(products[["product_id", "category"]], on="product_id", how="left")
+    categories = args.categories.split(",") if args.categories else sorted(df["category"].dropna().unique())
+
+    base_config = ForecastConfig(csv_path=str(csv_path), product_id="", platform="")
+    best: Dict[str, Dict[str, Any]] = {}
+    for category in categories:
+        results = search_category(
+            df,
+            category,
+            base_config,
+            strategy=args.strategy,
+            n_trials=args.trials,
+            max_epochs=args.max_epochs,
+            series_per_category=args.series_per_category,
+            horizon=args.horizon,
+            workers=args.workers,
+        )
+        winner = best_trial(results)
+        pruned = sum(item.pruned for item in results)
+        cpu = sum(item.train_seconds for item in results)
+        if winner is None:
+            print(f"{category}: không có trial hợp lệ ({len(results)} trial, {pruned} bị prune)")
+            continue
+        best[category] = {**winner.params, "epochs": winner.epochs}
+        print(
+            f"{category}: MAPE={winner.mape:.3f}% params={best[category]} "
+            f"({len(results)} trial, {pruned} bị prune, {cpu:.1f} CPU-s)"
+        )
+
+    output = Path(args.output) if args.output else csv_path.parent / "tuned_configs.json"
+    save_tuned_configs(output, best)
+    print(f"Đã lưu {len(best)} category vào {output}")
+
+
+if __name__ == "__main__":
+    main()
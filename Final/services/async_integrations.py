@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from services.integrations import AIContentGenerator, ProductImageProvider, TikiAPI
+from services.resilience import Deadline
+
+"""
+Phiên bản async (httpx.AsyncClient, dùng chung connection pool) của các client trong integrations.py.
+Logic dựng request/parse response, cache và circuit breaker được kế thừa nguyên từ bản đồng bộ.
+"""
+
+
+def build_async_client(max_connections: int = 100) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 2)
+    return httpx.AsyncClient(limits=limits)
+
+
+class AsyncAIContentGenerator(AIContentGenerator):
+    def __init__(self, client: httpx.AsyncClient, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.client = client
+
+    async def generate_summary_async(
+        self,
+        product_name: str,
+        platform: str,
+        history: Iterable[float],
+        predictions: Iterable[float],
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[Dict[str, str]]:
+        if not self.is_enabled():
+            return None
+        timeout = self.breaker.acquire(deadline)
+        if timeout is None:
+            return None
+
+        payload, headers = self._build_request(product_name, platform, history, predictions)
+        start = time.monotonic()
+        try:
+            resp = await self.client.post(self.api_url, headers=headers, json=payload, timeout=timeout)
+            resp.raise_for_status()
+            data = resp.json()
+        except (httpx.HTTPError, ValueError):
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success(time.monotonic() - start)
+        return self._parse_response(data)
+
+
+class AsyncProductImageProvider(ProductImageProvider):
+    """
+    get_image (đồng bộ, được service gọi khi dựng catalog và trong thread pool) không gọi mạng: trả ảnh đã cache
+    hoặc URL dự phòng và ghi nhớ từ khóa trong `pending`. asgi.py tra Unsplash thật qua get_image_async.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, placeholder_url: str, unsplash_key: Optional[str] = None) -> None:
+        super().__init__(placeholder_url, unsplash_key)
+        self.client = client
+        # URL dự phòng -> từ khóa, cho các ảnh chưa tra Unsplash.
+        self.pending: Dict[str, Tuple[str, ...]] = {}
+
+    def get_image(self, *keywords: str, deadline: Optional[Deadline] = None) -> str:
+        query = " ".join(filter(None, keywords)).strip()
+        if not query:
+            return self.placeholder_url
+        if query in self.cache:
+            return self.cache[query]
+        url = self._fallback_url(query)
+        if self.unsplash_key:
+            self.pending[url] = keywords
+        else:
+            self.cache[query] = url
+        return url
+
+    async def resolve_async(self, url: Optional[str], deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Ảnh thật cho một URL dự phòng do get_image trả về; None nếu URL không cần tra."""
+        keywords = self.pending.get(url or "")
+        if keywords is None:
+            return None
+        resolved = await self.get_image_async(*keywords, deadline=deadline)
+        # Circuit đang mở hoặc hết ngân sách: giữ URL dự phòng, lần sau tra lại.
+        return None if resolved == self.placeholder_url else resolved
+
+    async def get_image_async(self, *keywords: str, deadline: Optional[Deadline] = None) -> str:
+        query = " ".join(filter(None, keywords)).strip()
+        if not query:
+            return self.placeholder_url
+        if query in self.cache:
+            return self.cache[query]
+
+        url = None
+        if self.unsplash_key:
+            timeout = self.breaker.acquire(deadline)
+            if timeout is None:
+                return self.placeholder_url
+            url = await self._query_unsplash_async(query, timeout)
+
+        fallback = self._fallback_url(query)
+        self.pending.pop(fallback, None)
+        url = url or fallback
+        self.cache[query] = url
+        return url
+
+    async def _query_unsplash_async(self, query: str, timeout: float = 10) -> Optional[str]:
+        endpoint = "https://api.unsplash.com/search/photos"
+        params = {"query": query, "per_page": 1, "orientation": "squarish"}
+        headers = {"Authorization": f"Client-ID {self.unsplash_key}"}
+        start = time.monotonic()
+        try:
+            r = await self.client.get(endpoint, headers=headers, params=params, timeout=timeout)
+            r.raise_for_status()
+            data = r.json()
+        except (httpx.HTTPError, ValueError):
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success(time.monotonic() - start)
+        return self._parse_unsplash(data)
+
+
+class AsyncTikiAPI(TikiAPI):
+    def __init__(self, client: httpx.AsyncClient, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.client = client
+        # Gộp các request trùng query đang bay để không gọi Tiki nhiều lần cho cùng sản phẩm.
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def _request_async(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[Dict[str, Any]]:
+        timeout = self.breaker.acquire(deadline)
+        if timeout is None:
+            return None
+        url = f"{self.base_url}{path}"
+        start = time.monotonic()
+        try:
+            resp = await self.client.get(url, params=params, headers=self.session.headers, timeout=timeout)
+            resp.raise_for_status()
+            data = resp.json()
+        except (httpx.HTTPError, ValueError):
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success(time.monotonic() - start)
+        return data
+
+    async def search_products_async(
+        self, keyword: str, limit: int = 5, deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._search_async(keyword, limit, deadline) or []
+
+    async def _search_async(
+        self, keyword: str, limit: int, deadline: Optional[Deadline]
+    ) -> Optional[List[Dict[str, Any]]]:
+        if not self.enabled:
+            return []
+        query = (keyword or "").strip()
+        if not query:
+            return []
+        cache_key = f"{query.lower()}::{limit}"
+        if cache_key in self.search_cache:
+            return self.search_cache[cache_key]
+
+        task = self._inflight.get(cache_key)
+        if task is None:
+            params = {"limit": limit, "page": 1, "q": query}
+            task = asyncio.ensure_future(self._request_async("/products", params=params, deadline=deadline))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        payload = await asyncio.shield(task)
+        if payload is None:
+            return None
+        return self._store_search(cache_key, payload)
+
+    async def get_product_snapshot_async(
+        self, keyword: str, deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        query = (keyword or "").strip()
+        if not query:
+            return None
+        cache_key = query.lower()
+        if cache_key in self.snapshot_cache:
+            return self.snapshot_cache[cache_key]
+
+        results = await self._search_async(query, 1, deadline)
+        if results is None:
+            return None
+        snapshot = results[0] if results else None
+        self.snapshot_cache[cache_key] = snapshot
+        return snapshot
+
+    async def enrich_product_meta_async(
+        self, meta: Dict[str, Any], deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        if not self.enabled:
+            return meta
+        query = (meta.get("name") or meta.get("id") or "").strip()
+        if not query:
+            return meta
+        return self._apply_snapshot(meta, await self.get_product_snapshot_async(query, deadline=deadline))
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+SEARCH_FIELDS = ("name", "brand", "category")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_text(value: Any) -> str:
+    """Chuyển về chữ thường, bỏ dấu tiếng Việt để 'điện thoại' khớp 'dien thoai'."""
+    text = unicodedata.normalize("NFKD", str(value or "")).replace("đ", "d").replace("Đ", "D")
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(value: Any) -> List[str]:
+    return _TOKEN_RE.findall(normalize_text(value))
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[idx : idx + 3] for idx in range(len(padded) - 2)}
+
+
+class CatalogSearchIndex:
+    """
+    Index tìm kiếm trong bộ nhớ trên name/brand/category của catalog.
+
+    Mỗi token trong truy vấn khớp theo thứ tự ưu tiên: đúng token > tiền tố > trigram (gõ sai chính tả).
+    Kết quả là giao của các token, xếp theo điểm rồi theo tên.
+    """
+
+    def __init__(self, products: Iterable[Dict[str, Any]], min_trigram_similarity: float = 0.5) -> None:
+        self.min_trigram_similarity = min_trigram_similarity
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.trigram_postings: Dict[str, Set[str]] = defaultdict(set)
+        for product in products:
+            doc = len(self.ids)
+            self.ids.append(product["id"])
+            self.names.append(normalize_text(product.get("name") or product["id"]))
+            for field in SEARCH_FIELDS:
+                for token in tokenize(product.get(field)):
+                    self.postings[token].add(doc)
+        self.vocabulary = sorted(self.postings)
+        for token in self.vocabulary:
+            for gram in _trigrams(token):
+                self.trigram_postings[gram].add(token)
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\uffff")
+        return self.vocabulary[start:end]
+
+    def _fuzzy_tokens(self, token: str) -> List[str]:
+        grams = _trigrams(token)
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self.trigram_postings.get(gram, ()):
+                overlap[candidate] += 1
+        matches = []
+        for candidate, shared in overlap.items():
+            similarity = shared / len(grams | _trigrams(candidate))
+            if similarity >= self.min_trigram_similarity:
+                matches.append(candidate)
+        return matches
+
+    def _match_token(self, token: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for doc in self.postings.get(token, ()):
+            scores[doc] = 3.0
+        for candidate in self._prefix_tokens(token):
+            for doc in self.postings[candidate]:
+                scores.setdefault(doc, 2.0)
+        if not scores:
+            for candidate in self._fuzzy_tokens(token):
+                for doc in self.postings[candidate]:
+                    scores.setdefault(doc, 1.0)
+        return scores
+
+    def search(self, query: Optional[str]) -> List[str]:
+        """Trả về danh sách product_id khớp truy vấn; truy vấn rỗng trả về toàn bộ catalog."""
+        tokens = tokenize(query)
+        if not tokens:
+            return list(self.ids)
+
+        combined: Optional[Dict[int, float]] = None
+        for token in tokens:
+            scores = self._match_token(token)
+            if combined is None:
+                combined = scores
+            else:
+                combined = {doc: combined[doc] + score for doc, score in scores.items() if doc in combined}
+            if not combined:
+                return []
+
+        ranked: Sequence[Tuple[int, float]] = sorted(
+            combined.items(), key=lambda item: (-item[1], self.names[item[0]])
+        )
+        return [self.ids[doc] for doc, _ in ranked]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Trường của một sản phẩm trong catalog (meta gốc + trường live_* do TikiAPI._apply_snapshot thêm vào).
+PRODUCT_FIELDS = (
+    "id",
+    "name",
+    "brand",
+    "category",
+    "image",
+    "platforms",
+    "live_price",
+    "live_original_price",
+    "live_source",
+    "live_url",
+    "live_rating",
+    "live_review_count",
+    "live_checked_at",
+    "live_seller",
+)
+
+# Trường đổi ở mỗi lần gọi Tiki dù dữ liệu không đổi, không tính là thay đổi của catalog.
+VOLATILE_FIELDS = ("live_checked_at",)
+
+
+def _dumps(data: Any) -> bytes:
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS, default=str)
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+
+
+def _changed(old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+    keys = (old.keys() | new.keys()).difference(VOLATILE_FIELDS)
+    return any(old.get(key) != new.get(key) for key in keys)
+
+
+class CatalogStore:
+    """
+    Catalog sản phẩm dùng chung giữa các thread request.
+
+    - Tra id -> vị trí O(1); mỗi lần cập nhật thay cả dict của sản phẩm (không sửa dict cũ),
+      nên reader đang giữ tham chiếu cũ không thấy dữ liệu nửa vời.
+    - Ghi được tuần tự hóa bằng một lock; đọc không cần lock.
+    - Snapshot /api/catalog (payload + bytes JSON + ETag) chỉ dựng lại khi enrichment thật sự đổi một trường.
+    """
+
+    def __init__(self, products: Iterable[Dict[str, Any]], platforms: List[str]) -> None:
+        self.platforms = platforms
+        self._items: List[Dict[str, Any]] = list(products)
+        self._positions: Dict[str, int] = {item["id"]: idx for idx, item in enumerate(self._items)}
+        # Meta của sản phẩm ngoài catalog (chỉ có trong dataset) được cache nhưng không hiện trong danh sách.
+        self._extra: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.version = 0
+        self._snapshot: Optional[Tuple[int, Dict[str, Any], bytes, str]] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._positions or product_id in self._extra
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Trả về dict dùng chung, không được sửa trực tiếp (copy trước khi sửa)."""
+        idx = self._positions.get(product_id)
+        if idx is not None:
+            return self._items[idx]
+        return self._extra.get(product_id)
+
+    def update(self, product_meta: Dict[str, Any]) -> bool:
+        """Lưu meta mới của một sản phẩm, trả về True nếu snapshot catalog bị đổi."""
+        product_id = product_meta.get("id")
+        if not product_id:
+            return False
+        meta = dict(product_meta)
+        with self._lock:
+            idx = self._positions.get(product_id)
+            if idx is None:
+                self._extra[product_id] = meta
+                return False
+            if not _changed(self._items[idx], meta):
+                # Vẫn giữ bản mới nhất (ví dụ live_checked_at) nhưng không làm mất snapshot.
+                self._items[idx] = meta
+                return False
+            self._items[idx] = meta
+            self.version += 1
+            return True
+
+    def products(self) -> List[Dict[str, Any]]:
+        return list(self._items)
+
+    def _build_snapshot(self) -> Tuple[int, Dict[str, Any], bytes, str]:
+        with self._lock:
+            version = self.version
+            payload = {"platforms": self.platforms, "products": list(self._items)}
+        body = _dumps(payload)
+        return version, payload, body, hashlib.sha1(body).hexdigest()
+
+    def _current_snapshot(self) -> Tuple[int, Dict[str, Any], bytes, str]:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] != self.version:
+            snapshot = self._snapshot = self._build_snapshot()
+        return snapshot
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self._current_snapshot()[1]
+
+    def snapshot_json(self) -> Tuple[bytes, str]:
+        """Catalog đã serialize sẵn và ETag tương ứng (chưa có dấu nháy)."""
+        _, _, body, etag = self._current_snapshot()
+        return body, etag
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import math
 import os
+import threading
+import time
+from collections import Counter
 from dataclasses import dataclass
-from datetime import timedelta
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
+# Mặc định 1 thread; models.cpu_allocator nới số thread torch theo số job train đang chạy.
 os.environ.setdefault("OMP_NUM_THREADS", "1")
 os.environ.setdefault("MKL_NUM_THREADS", "1")
 os.environ.setdefault("NUMEXPR_NUM_THREADS", "1")
@@ -15,8 +20,17 @@ os.environ.setdefault("KMP_INIT_AT_FORK", "FALSE")
 import numpy as np
 import pandas as pd
 
-from models.LSTM import ForecastConfig, train_and_predict
+from models.quantization_verdicts import load_quantization_verdicts
+from models.tuned_configs import load_tuned_configs
+from services.catalog_search import CatalogSearchIndex
+from services.catalog_store import PRODUCT_FIELDS, CatalogStore
 from services.integrations import AIContentGenerator, ProductImageProvider, TikiAPI
+from services.price_alerts import PriceAlertEngine
+from services.resilience import Deadline
+from services.series_encoding import encode_history, lttb_indices
+
+if TYPE_CHECKING:
+    from models.LSTM import ForecastConfig
 
 """
 Service xử lý dữ liệu + AI cho hệ thống dự báo giá.
@@ -25,8 +39,14 @@ Biến môi trường liên quan:
 - GEN_AI_API_KEY: bật mô tả/khuyến nghị từ model ngoài (ví dụ OpenAI).
 - GEN_AI_MODEL, GEN_AI_API_URL: tùy chọn override model hoặc endpoint.
 - UNSPLASH_ACCESS_KEY: nếu có sẽ dùng API Unsplash chính thức để lấy ảnh sản phẩm.
+- INGEST_FLUSH_ROWS: số dòng giá mới gom lại trước khi ghép vào DataFrame (mặc định 10000; đọc dữ liệu
+  cũng kích hoạt việc ghép).
+- REQUEST_BUDGET_SECONDS: ngân sách thời gian cho mỗi request get_metrics/get_prediction; lời gọi ngoài
+  không kịp trong phần còn lại sẽ bị bỏ qua và dùng fallback (mặc định không giới hạn).
 """
 
+MAX_CATALOG_PAGE_SIZE = 500
+
 DEFAULT_IMAGE = "https://dummyimage.com/300x300/1f2937/ffffff&text=AI"
 
 PRODUCT_METADATA: Dict[str, Dict[str, str]] = {
@@ -38,6 +58,16 @@ def _format_currency(value: float) -> str:
     return f"{int(round(value)):,} đ".replace(",", ".")
 
 
+def _load_forecaster():
+    """
+    Import models.LSTM (kéo theo torch + sklearn) khi cần dự báo lần đầu.
+    Worker chỉ phục vụ /api/catalog và /api/metrics sẽ không phải nạp stack mô hình.
+    """
+    from models import LSTM
+
+    return LSTM
+
+
 @dataclass
 class PredictionSummary:
     analysis: str
@@ -45,6 +75,16 @@ class PredictionSummary:
     change_pct: float
 
 
+@dataclass
+class PrecomputedForecast:
+    predictions: List[Dict[str, Any]]
+    raw_predictions: np.ndarray
+    recent_prices: List[float]
+    summary: PredictionSummary
+    computed_at: float
+    intervals: Optional[Dict[str, List[float]]] = None
+
+
 class ProductAnalyticsService:
     def __init__(
         self,
@@ -59,6 +99,14 @@ class ProductAnalyticsService:
         marketplace_client: Optional[TikiAPI] = None,
         products_path: Optional[str | Path] = None,
         platforms_path: Optional[str | Path] = None,
+        inference_backend: str = "eager",
+        artifact_dir: Optional[str | Path] = None,
+        forecast_max_age: Optional[float] = None,
+        forecast_mode: str = "autoregressive",
+        tuned_configs_path: Optional[str | Path] = None,
+        uncertainty_samples: int = 0,
+        global_model_path: Optional[str | Path] = None,
+        quantization_verdicts_path: Optional[str | Path] = None,
     ) -> None:
         self.csv_path = Path(csv_path)
         self.seq_len = seq_len
@@ -66,6 +114,37 @@ class ProductAnalyticsService:
         self.epochs = epochs
         self.batch_size = batch_size
         self.lr = lr
+        self.inference_backend = inference_backend
+        self.forecast_mode = forecast_mode
+        self.uncertainty_samples = uncertainty_samples
+        self.tuned_configs_path = (
+            Path(tuned_configs_path) if tuned_configs_path else self.csv_path.parent / "tuned_configs.json"
+        )
+        self.tuned_configs = load_tuned_configs(self.tuned_configs_path)
+        # Backend theo từng series do benchmarks/quantization_report.py chọn; series không có trong file
+        # dùng inference_backend chung.
+        self.quantization_verdicts_path = (
+            Path(quantization_verdicts_path)
+            if quantization_verdicts_path
+            else self.csv_path.parent / "quantization_verdicts.json"
+        )
+        self.quantization_verdicts = load_quantization_verdicts(self.quantization_verdicts_path)
+        # forecast_mode="global": mọi series dùng chung một model (models.global_model), train offline hoặc ở thread nền.
+        # Ở các chế độ khác, model global (nếu đã có file) phục vụ series quá ngắn cho LSTM riêng.
+        self.global_model_path = (
+            Path(global_model_path) if global_model_path else self.csv_path.parent / "global_model.pt"
+        )
+        self._global_model: Any = None
+        self._global_model_lock = threading.Lock()
+        self._global_model_thread: Optional[threading.Thread] = None
+        self.artifact_dir = Path(artifact_dir) if artifact_dir else None
+        if forecast_max_age is None:
+            forecast_max_age = float(os.getenv("FORECAST_MAX_AGE_SECONDS", "21600"))
+        self.forecast_max_age = forecast_max_age
+        self.forecast_store: Dict[Tuple[str, str, int], PrecomputedForecast] = {}
+        self.request_counts: Counter = Counter()
+        self._forecast_lock = threading.Lock()
+        self.request_budget = float(os.getenv("REQUEST_BUDGET_SECONDS", "0")) or None
         self.ai_generator = ai_generator or AIContentGenerator()
         self.image_provider = image_provider or ProductImageProvider(DEFAULT_IMAGE)
         self.marketplace_client = marketplace_client or TikiAPI()
@@ -80,12 +159,32 @@ class ProductAnalyticsService:
         self.products_lookup = (
             self.products_df.set_index("product_id").to_dict(orient="index") if self.products_df is not None else {}
         )
-        self.df = self._load_dataframe()
-        self.df["date"] = pd.to_datetime(self.df["date"])
-        self.df = self.df.sort_values("date")
+        self._ingest_lock = threading.Lock()
+        # Dòng giá mới được gom lại và chỉ ghép vào DataFrame khi có người đọc self.df hoặc khi đủ một lô.
+        self._pending_rows: List[Dict[str, Any]] = []
+        self.ingest_flush_rows = int(os.getenv("INGEST_FLUSH_ROWS", "10000"))
+        self._df = self._load_dataframe()
+        self._df["date"] = pd.to_datetime(self._df["date"])
+        self._df = self._df.sort_values("date")
         self.platforms = self._load_platforms_list()
-        self.catalog = self._build_catalog()
-        self.catalog_index = {item["id"]: item for item in self.catalog}
+        self.catalog_store = CatalogStore(self._build_catalog(), self.platforms)
+        self.search_index = CatalogSearchIndex(self.catalog_store.products())
+        # Trạng thái cửa sổ của engine cảnh báo chỉ được nạp từ self.df khi có dòng giá mới đầu tiên.
+        self.alert_engine = PriceAlertEngine()
+        self._alerts_bootstrapped = False
+        if os.getenv("PRELOAD_FORECAST_MODEL", "").lower() in {"1", "true", "on"}:
+            self.warmup_forecaster()
+
+    def integration_health(self) -> Dict[str, Any]:
+        """Trạng thái circuit breaker + timeout hiện tại của từng integration."""
+        clients = (self.marketplace_client, self.image_provider, self.ai_generator)
+        return {
+            "integrations": [client.breaker.snapshot() for client in clients if getattr(client, "breaker", None)]
+        }
+
+    def warmup_forecaster(self) -> None:
+        """Nạp trước torch/sklearn (dùng cho worker chuyên chạy dự báo)."""
+        _load_forecaster()
 
     def _load_dataframe(self) -> pd.DataFrame:
         """
@@ -197,23 +296,52 @@ class ProductAnalyticsService:
         return catalog
 
     def get_catalog(self) -> Dict[str, Any]:
-        return {"platforms": self.platforms, "products": self.catalog}
+        return self.catalog_store.snapshot()
+
+    def get_catalog_json(self) -> Tuple[bytes, str]:
+        """Catalog đầy đủ đã serialize sẵn + ETag, chỉ dựng lại khi meta sản phẩm thay đổi."""
+        return self.catalog_store.snapshot_json()
+
+    def search_catalog(
+        self,
+        query: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 50,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        unknown = [key for key in fields or () if key not in PRODUCT_FIELDS]
+        if unknown:
+            raise ValueError(f"Trường không hợp lệ: {', '.join(unknown)}.")
+        page = max(1, page)
+        page_size = min(max(1, page_size), MAX_CATALOG_PAGE_SIZE)
+        matches = self.search_index.search(query)
+        start = (page - 1) * page_size
+        products = []
+        for product_id in matches[start : start + page_size]:
+            item = self.catalog_store.get(product_id)
+            if item is None:
+                continue
+            if fields:
+                item = {key: item.get(key) for key in fields}
+            products.append(item)
+        return {
+            "platforms": self.platforms,
+            "products": products,
+            "page": page,
+            "page_size": page_size,
+            "total": len(matches),
+        }
 
     def _cache_product_meta(self, product_meta: Dict[str, Any]) -> None:
-        product_id = product_meta.get("id")
-        if not product_id:
-            return
-        self.catalog_index[product_id] = product_meta
-        for idx, item in enumerate(self.catalog):
-            if item.get("id") == product_id:
-                self.catalog[idx] = product_meta
-                break
+        self.catalog_store.update(product_meta)
 
-    def _apply_marketplace_meta(self, product_meta: Dict[str, Any]) -> Dict[str, Any]:
+    def _apply_marketplace_meta(
+        self, product_meta: Dict[str, Any], deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         if not self.marketplace_client or not getattr(self.marketplace_client, "is_enabled", lambda: False)():
             return product_meta
         try:
-            enriched = self.marketplace_client.enrich_product_meta(product_meta)
+            enriched = self.marketplace_client.enrich_product_meta(product_meta, deadline=deadline)
         except Exception:
             return product_meta
         return enriched or product_meta
@@ -225,11 +353,85 @@ class ProductAnalyticsService:
             raise ValueError("Không tìm thấy dữ liệu cho lựa chọn này.")
         return subset
 
-    def _get_product_meta(self, product_id: str) -> Dict[str, Any]:
-        meta = self.catalog_index.get(product_id)
+    @property
+    def df(self) -> pd.DataFrame:
+        if self._pending_rows:
+            with self._ingest_lock:
+                self._flush_pending_rows()
+        return self._df
+
+    def ingest_prices(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Chạy engine cảnh báo trên các dòng giá mới và gom chúng vào bộ đệm (O(số dòng mới), không đụng
+        tới self.df). Mỗi dòng cần product_id, platform, date, price; các cột khác của dataset.csv là tùy chọn.
+        """
+        required = ("product_id", "platform", "date", "price")
+        parsed = []
+        for row in rows:
+            if not isinstance(row, dict):
+                raise ValueError("Mỗi dòng giá phải là một object.")
+            missing = [key for key in required if row.get(key) in (None, "")]
+            if missing:
+                raise ValueError(f"Dòng giá thiếu trường: {', '.join(missing)}.")
+            try:
+                date, price = pd.Timestamp(row["date"]), float(row["price"])
+            except (TypeError, ValueError):
+                raise ValueError(f"Dòng giá không hợp lệ: date={row['date']!r}, price={row['price']!r}.")
+            if not math.isfinite(price) or price <= 0:
+                raise ValueError(f"Giá phải là số dương hữu hạn: price={row['price']!r}.")
+            parsed.append({**row, "date": date, "price": price})
+        if not parsed:
+            return []
+        parsed.sort(key=lambda row: row["date"])
+
+        with self._ingest_lock:
+            if not self._alerts_bootstrapped:
+                self._flush_pending_rows()
+                self.alert_engine.bootstrap(self._df)
+                self._alerts_bootstrapped = True
+            fired = self.alert_engine.ingest(parsed)
+            self._pending_rows.extend(parsed)
+            if len(self._pending_rows) >= self.ingest_flush_rows:
+                self._flush_pending_rows()
+        return [alert.to_dict() for alert in fired]
+
+    def _flush_pending_rows(self) -> None:
+        """Ghép bộ đệm vào self._df một lần cho cả lô (gọi khi đang giữ _ingest_lock)."""
+        if not self._pending_rows:
+            return
+        new_rows = pd.DataFrame(self._pending_rows)
+        self._pending_rows = []
+        if self.products_df is not None:
+            extra = [col for col in self.products_df.columns if col not in new_rows.columns or col == "product_id"]
+            new_rows = new_rows.merge(self.products_df[extra], on="product_id", how="left")
+        combined = pd.concat([self._df, new_rows], ignore_index=True)
+        # Dòng mới thường nằm sau ngày cuối cùng: khi đó không cần sắp xếp lại cả DataFrame.
+        if len(self._df) and new_rows["date"].min() < self._df["date"].max():
+            combined = combined.sort_values("date", kind="mergesort")
+        self._df = combined
+
+    def get_alerts(self, since: int = 0, limit: int = 100) -> Dict[str, Any]:
+        alerts = self.alert_engine.alerts(since=since, limit=limit)
+        return {"alerts": alerts, "last_id": alerts[-1]["id"] if alerts else since}
+
+    def get_product_meta(
+        self, product_id: str, enrich: bool = True, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        return self._get_product_meta(product_id, enrich=enrich, deadline=deadline)
+
+    def store_product_meta(self, product_meta: Dict[str, Any]) -> None:
+        """Lưu meta đã được làm giàu ở bên ngoài (ví dụ client async trong asgi.py)."""
+        self._cache_product_meta(product_meta)
+
+    def _get_product_meta(
+        self, product_id: str, enrich: bool = True, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        meta = self.catalog_store.get(product_id)
         if meta:
             meta = dict(meta)
-            meta = self._apply_marketplace_meta(meta)
+            if not enrich:
+                return meta
+            meta = self._apply_marketplace_meta(meta, deadline)
             self._cache_product_meta(meta)
             return meta
         fallback = self.products_lookup.get(product_id, {})
@@ -240,10 +442,13 @@ class ProductAnalyticsService:
             "name": fallback.get("name", product_id),
             "brand": fallback.get("brand", ""),
             "category": fallback.get("category", ""),
-            "image": fallback.get("image") or self.image_provider.get_image(fallback.get("name", product_id)),
+            "image": fallback.get("image")
+            or self.image_provider.get_image(fallback.get("name", product_id), deadline=deadline),
             "platforms": self.platforms,
         }
-        meta = self._apply_marketplace_meta(meta)
+        if not enrich:
+            return meta
+        meta = self._apply_marketplace_meta(meta, deadline)
         self._cache_product_meta(meta)
         return meta
 
@@ -264,16 +469,30 @@ class ProductAnalyticsService:
             best_platform = min(prices.items(), key=lambda item: item[1])[0]
         return {"prices": prices, "best_platform": best_platform}
 
-    def get_metrics(self, product_id: str, platform: str, history_days: Optional[int] = None) -> Dict[str, Any]:
+    def get_metrics(
+        self,
+        product_id: str,
+        platform: str,
+        history_days: Optional[int] = None,
+        max_points: Optional[int] = None,
+        history_format: str = "records",
+        enrich: bool = True,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        if max_points is not None and max_points < 2:
+            raise ValueError("max_points phải >= 2 (giữ cả điểm đầu và giá mới nhất).")
+        deadline = deadline or Deadline.after(self.request_budget)
         subset = self._filter_series(product_id, platform)
         days = history_days or self.history_days
         recent = subset.tail(max(1, days))
         latest = subset.iloc[-1]
 
-        history_payload = [
-            {"date": row["date"].strftime("%Y-%m-%d"), "price": float(row["price"])}
-            for _, row in recent.iterrows()
-        ]
+        history_dates = recent["date"].to_numpy(dtype="datetime64[D]")
+        history_prices = recent["price"].to_numpy(dtype=np.float64)
+        if max_points is not None and max_points < len(history_prices):
+            keep = lttb_indices(history_prices, max_points)
+            history_dates, history_prices = history_dates[keep], history_prices[keep]
+        history_payload = encode_history(history_dates, history_prices, history_format)
 
         stats = {
             "avg_price": float(recent["price"].mean()),
@@ -284,7 +503,7 @@ class ProductAnalyticsService:
         rating = latest.get("rating")
         stock = latest.get("stock")
 
-        product_meta = self._get_product_meta(product_id)
+        product_meta = self._get_product_meta(product_id, enrich=enrich, deadline=deadline)
         comparison = self._build_comparison(product_id)
 
         return {
@@ -300,7 +519,12 @@ class ProductAnalyticsService:
             "sample_size": int(len(subset)),
         }
 
-    def _generate_summary(self, history_prices: List[float], predictions: np.ndarray) -> PredictionSummary:
+    def _generate_summary(
+        self,
+        history_prices: List[float],
+        predictions: np.ndarray,
+        intervals: Optional[Dict[str, List[float]]] = None,
+    ) -> PredictionSummary:
         if not history_prices:
             history_prices = [predictions[0]]
         last_observed = history_prices[-1]
@@ -311,8 +535,14 @@ class ProductAnalyticsService:
         direction = "tăng" if change > 0 else "giảm"
         magnitude = abs(change_pct)
 
+        # Khoảng p10-p90 (đã giãn theo backtest, models.LSTM.calibrate_interval_scale) ở ngày cuối vẫn chứa
+        # giá hiện tại thì chưa đủ chắc chắn để khuyên chờ/mua sớm.
+        uncertain = bool(intervals) and intervals["p10"][-1] <= last_observed <= intervals["p90"][-1]
+
         if magnitude < 0.5:
             recommendation = "Giá khá ổn định, bạn có thể mua bất cứ lúc nào."
+        elif uncertain:
+            recommendation = "Xu hướng giá chưa rõ ràng, hãy theo dõi thêm trước khi quyết định."
         elif change > 0:
             recommendation = "AI khuyến nghị nên mua sớm trước khi giá tăng thêm."
         else:
@@ -323,60 +553,239 @@ class ProductAnalyticsService:
             f"Giá trung bình {len(history_prices)} ngày qua là {_format_currency(avg_price)}. "
             f"Mô hình dự báo giá sẽ {direction} khoảng {magnitude:.2f}% trong {len(predictions)} ngày tới."
         )
+        if intervals:
+            analysis += (
+                f" Khoảng dự báo p10–p90 (ước lượng, đã hiệu chỉnh theo backtest) cho ngày cuối:"
+                f" {_format_currency(intervals['p10'][-1])}"
+                f" – {_format_currency(intervals['p90'][-1])}."
+            )
 
         return PredictionSummary(analysis=analysis, recommendation=recommendation, change_pct=change_pct)
 
-    def get_prediction(self, product_id: str, platform: str, future_days: int = 7) -> Dict[str, Any]:
-        config = ForecastConfig(
+    def _build_forecast_config(self, product_id: str, platform: str) -> "ForecastConfig":
+        params: Dict[str, Any] = {
+            "seq_len": self.seq_len,
+            "batch_size": self.batch_size,
+            "epochs": self.epochs,
+            "lr": self.lr,
+        }
+        category = self.products_lookup.get(product_id, {}).get("category")
+        params.update(self.tuned_configs.get(category, {}))
+        return _load_forecaster().ForecastConfig(
             csv_path=str(self.csv_path),
             product_id=product_id,
             platform=platform,
-            seq_len=self.seq_len,
-            batch_size=self.batch_size,
-            epochs=self.epochs,
-            lr=self.lr,
+            inference_backend=self.quantization_verdicts.get(product_id, {}).get(platform, self.inference_backend),
+            artifact_dir=str(self.artifact_dir) if self.artifact_dir else None,
+            # Model global chưa sẵn sàng thì series chạy LSTM riêng kiểu autoregressive.
+            forecast_mode="autoregressive" if self.forecast_mode == "global" else self.forecast_mode,
+            uncertainty_samples=self.uncertainty_samples,
+            **params,
+        )
+
+    def _run_forecast(self, config: "ForecastConfig", future_days: int) -> Any:
+        forecaster = _load_forecaster()
+        from models.cpu_allocator import get_allocator
+
+        path = forecaster.artifact_path(config)
+        # Số thread torch theo số job đang chạy: request lẻ dùng hết core, lúc tải cao mỗi job co lại.
+        with get_allocator().job() as lease:
+            # Artifact chỉ dùng lại khi mới hơn file dữ liệu; artifact TorchScript không còn Dropout để lấy mẫu
+            # nên chế độ uncertainty luôn train lại.
+            reusable = path is not None and path.exists() and not config.uncertainty_samples
+            if reusable and path.stat().st_mtime >= self.csv_path.stat().st_mtime:
+                result = forecaster.predict_from_artifact(config, future_days=future_days, df=self.df)
+                if result is not None:
+                    return result
+            return forecaster.train_and_predict(
+                config, future_days=future_days, df=self.df, epoch_callback=lease.epoch_callback
+            )
+
+    def _load_global_model(self, train_if_missing: bool = True) -> Any:
+        """
+        Nạp model global từ file, không bao giờ train trong request. Nếu file chưa có hoặc cũ hơn dataset và
+        train_if_missing thì train lại ở thread nền; trong lúc đó dùng file cũ (nếu có) hoặc trả về None.
+        """
+        with self._global_model_lock:
+            if self._global_model is not None:
+                return self._global_model
+            from models.global_model import GlobalForecaster
+
+            path = self.global_model_path
+            if path.exists():
+                self._global_model = GlobalForecaster.load(path)
+            stale = self._global_model is None or path.stat().st_mtime < self.csv_path.stat().st_mtime
+            if stale and train_if_missing:
+                self._start_global_model_training()
+            return self._global_model
+
+    def _start_global_model_training(self) -> None:
+        """Train model global trên self.df ở thread nền (gọi khi đang giữ _global_model_lock)."""
+        if self._global_model_thread is not None and self._global_model_thread.is_alive():
+            return
+        self._global_model_thread = threading.Thread(
+            target=self._train_global_model, name="global-model-train", daemon=True
         )
-        forecast_result = train_and_predict(config, future_days=future_days, df=self.df)
+        self._global_model_thread.start()
+
+    def _train_global_model(self) -> None:
+        from models.cpu_allocator import get_allocator
+        from models.global_model import GlobalForecaster
+
+        try:
+            with get_allocator().job():
+                model = GlobalForecaster().fit(self.df)
+            model.save(self.global_model_path)
+        except Exception as e:
+            print("⚠️ Train model global thất bại:", e)
+            return
+        with self._global_model_lock:
+            self._global_model = model
+        print(f"ℹ️ Đã train model global trong {model.train_seconds:.1f}s, lưu tại {self.global_model_path}")
+
+    def _run_global_forecast(self, product_id: str, platform: str, future_days: int, model: Any) -> Any:
+        subset = self._filter_series(product_id, platform)
+        meta = {
+            "product_id": product_id,
+            "platform": platform,
+            "brand": self.products_lookup.get(product_id, {}).get("brand"),
+            "category": self.products_lookup.get(product_id, {}).get("category"),
+        }
+        promo = subset["is_promo"].to_numpy() if "is_promo" in subset.columns else None
+        predictions = model.predict(subset["price"].to_numpy(), meta, future_days, promo=promo)
+        return _load_forecaster().ForecastResult(
+            predictions=predictions, train_loss=float("nan"), test_loss=float("nan"), subset=subset
+        )
+
+    def _forecast_series(self, product_id: str, platform: str, future_days: int) -> PrecomputedForecast:
+        global_model = self._load_global_model() if self.forecast_mode == "global" else None
+        if global_model is None:
+            # forecast_mode="global" khi model còn đang train ở nền: tạm dùng LSTM riêng của series.
+            config = self._build_forecast_config(product_id, platform)
+            if len(self._filter_series(product_id, platform)) < config.seq_len + 5:
+                # Series quá ngắn cho LSTM riêng (SKU mới): dùng model global nếu đã train sẵn.
+                global_model = self._load_global_model(train_if_missing=False)
+                if global_model is None and self.forecast_mode == "global":
+                    raise ValueError(
+                        "Model global đang được train và series này quá ngắn cho LSTM riêng, hãy thử lại sau."
+                    )
+        if global_model is not None:
+            forecast_result = self._run_global_forecast(product_id, platform, future_days, global_model)
+        else:
+            forecast_result = self._run_forecast(config, future_days)
         predictions = [float(value) for value in forecast_result.predictions]
         subset = self._filter_series(product_id, platform)
         last_date = subset["date"].max()
-        product_meta = self._get_product_meta(product_id)
+
+        intervals = None
+        if forecast_result.intervals is not None:
+            intervals = {name: [float(value) for value in band] for name, band in forecast_result.intervals.items()}
 
         prediction_payload = []
         for idx, price in enumerate(predictions, start=1):
-            prediction_payload.append(
-                {
-                    "date": (last_date + timedelta(days=idx)).strftime("%Y-%m-%d"),
-                    "price": round(price, 2),
-                }
-            )
+            point = {
+                "date": (last_date + timedelta(days=idx)).strftime("%Y-%m-%d"),
+                "price": round(price, 2),
+            }
+            if intervals:
+                point.update({name: round(band[idx - 1], 2) for name, band in intervals.items()})
+            prediction_payload.append(point)
 
         recent_prices = subset.tail(self.history_days)["price"].tolist()
-        summary_payload = None
-        try:
-            summary_payload = self.ai_generator.generate_summary(
-                product_meta["name"],
-                platform,
-                recent_prices,
-                forecast_result.predictions,
-            )
-        except Exception as e:
-            print("⚠️ AI summary failed:", e)
-            summary_payload = None
-
-        fallback_summary = self._generate_summary(recent_prices, forecast_result.predictions)
-        analysis_text = summary_payload["analysis"] if summary_payload else "Không thể kết nối tới dịch vụ AI. Vui lòng thử lại."
-        summary = PredictionSummary(
-            analysis=analysis_text,
-            recommendation=fallback_summary.recommendation,
-            change_pct=fallback_summary.change_pct,
+        return PrecomputedForecast(
+            predictions=prediction_payload,
+            raw_predictions=forecast_result.predictions,
+            recent_prices=recent_prices,
+            summary=self._generate_summary(recent_prices, forecast_result.predictions, intervals),
+            computed_at=time.time(),
+            intervals=intervals,
         )
 
+    def record_request(self, product_id: str, platform: str) -> None:
+        with self._forecast_lock:
+            self.request_counts[(product_id, platform)] += 1
+
+    def series_by_popularity(self) -> List[Tuple[str, str]]:
+        """Mọi cặp (product_id, platform) trong dữ liệu, series được hỏi nhiều nhất đứng trước."""
+        pairs = self.df[["product_id", "platform"]].drop_duplicates().itertuples(index=False, name=None)
+        with self._forecast_lock:
+            counts = dict(self.request_counts)
+        return sorted(pairs, key=lambda pair: -counts.get(pair, 0))
+
+    def precompute_forecast(self, product_id: str, platform: str, future_days: int = 7) -> PrecomputedForecast:
+        forecast = self._forecast_series(product_id, platform, future_days)
+        with self._forecast_lock:
+            self.forecast_store[(product_id, platform, future_days)] = forecast
+        return forecast
+
+    def get_precomputed_forecast(self, product_id: str, platform: str, future_days: int) -> Optional[PrecomputedForecast]:
+        with self._forecast_lock:
+            forecast = self.forecast_store.get((product_id, platform, future_days))
+        if forecast is None or time.time() - forecast.computed_at > self.forecast_max_age:
+            return None
+        return forecast
+
+    def get_forecast(self, product_id: str, platform: str, future_days: int = 7) -> Tuple[PrecomputedForecast, bool]:
+        """Trả về (forecast, precomputed): ưu tiên kết quả tính trước còn mới, nếu không thì train ngay."""
+        self.record_request(product_id, platform)
+        forecast = self.get_precomputed_forecast(product_id, platform, future_days)
+        if forecast is not None:
+            return forecast, True
+        return self._forecast_series(product_id, platform, future_days), False
+
+    def build_prediction_response(
+        self,
+        product_meta: Dict[str, Any],
+        platform: str,
+        forecast: PrecomputedForecast,
+        precomputed: bool,
+        summary_payload: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        if precomputed:
+            summary = forecast.summary
+        else:
+            fallback_summary = forecast.summary
+            # LLM lỗi, circuit đang mở hoặc hết ngân sách thời gian: dùng phân tích theo luật.
+            analysis_text = summary_payload["analysis"] if summary_payload else fallback_summary.analysis
+            summary = PredictionSummary(
+                analysis=analysis_text,
+                recommendation=fallback_summary.recommendation,
+                change_pct=fallback_summary.change_pct,
+            )
+
         return {
             "product": product_meta,
             "platform": platform,
-            "predictions": prediction_payload,
+            "predictions": forecast.predictions,
             "ai_summary": summary.analysis,
             "recommendation": summary.recommendation,
             "expected_change_pct": float(summary.change_pct),
+            "generated_at": datetime.fromtimestamp(forecast.computed_at).isoformat(timespec="seconds"),
         }
+
+    def get_prediction(
+        self,
+        product_id: str,
+        platform: str,
+        future_days: int = 7,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        deadline = deadline or Deadline.after(self.request_budget)
+        product_meta = self._get_product_meta(product_id, deadline=deadline)
+        forecast, precomputed = self.get_forecast(product_id, platform, future_days)
+
+        summary_payload = None
+        if not precomputed:
+            try:
+                summary_payload = self.ai_generator.generate_summary(
+                    product_meta["name"],
+                    platform,
+                    forecast.recent_prices,
+                    forecast.raw_predictions,
+                    deadline=deadline,
+                )
+            except Exception as e:
+                print("⚠️ AI summary failed:", e)
+                summary_payload = None
+
+        return self.build_prediction_response(product_meta, platform, forecast, precomputed, summary_payload)
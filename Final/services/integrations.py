@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import os
 import json
+import time
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import requests
 
+from services.resilience import CircuitBreaker, Deadline
+
 
 
 class AIContentGenerator:
@@ -26,6 +29,7 @@ class AIContentGenerator:
         self.api_url = api_url or os.getenv("GEN_AI_API_URL", "https://api.openai.com/v1/chat/completions")
         self.model = model or os.getenv("GEN_AI_MODEL", "gpt-4o-mini")
         self.timeout = timeout
+        self.breaker = CircuitBreaker("llm", max_timeout=timeout, slow_call_seconds=timeout / 2)
 
     def is_enabled(self) -> bool:
         return bool(self.api_key)
@@ -40,16 +44,13 @@ class AIContentGenerator:
             content = "\n".join(lines).strip()
         return content
 
-    def generate_summary(
+    def _build_request(
         self,
         product_name: str,
         platform: str,
         history: Iterable[float],
         predictions: Iterable[float],
-    ) -> Optional[Dict[str, str]]:
-        if not self.is_enabled():
-            return None
-
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
         history_list = list(history)
         prediction_list = list(predictions)
 
@@ -76,14 +77,35 @@ class AIContentGenerator:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        return payload, headers
 
+    def generate_summary(
+        self,
+        product_name: str,
+        platform: str,
+        history: Iterable[float],
+        predictions: Iterable[float],
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[Dict[str, str]]:
+        if not self.is_enabled():
+            return None
+        timeout = self.breaker.acquire(deadline)
+        if timeout is None:
+            return None
+
+        payload, headers = self._build_request(product_name, platform, history, predictions)
+        start = time.monotonic()
         try:
-            resp = requests.post(self.api_url, headers=headers, json=payload, timeout=self.timeout)
+            resp = requests.post(self.api_url, headers=headers, json=payload, timeout=timeout)
             resp.raise_for_status()
             data = resp.json()
-        except requests.RequestException:
+        except (requests.RequestException, ValueError):
+            self.breaker.record_failure()
             return None
+        self.breaker.record_success(time.monotonic() - start)
+        return self._parse_response(data)
 
+    def _parse_response(self, data: Any) -> Optional[Dict[str, str]]:
         try:
             content = data["choices"][0]["message"]["content"]
         except (KeyError, IndexError, TypeError):
@@ -116,8 +138,9 @@ class ProductImageProvider:
         self.placeholder_url = placeholder_url
         self.unsplash_key = unsplash_key or os.getenv("UNSPLASH_ACCESS_KEY")
         self.cache: Dict[str, str] = {}
+        self.breaker = CircuitBreaker("unsplash", max_timeout=10, slow_call_seconds=5)
 
-    def get_image(self, *keywords: str) -> str:
+    def get_image(self, *keywords: str, deadline: Optional[Deadline] = None) -> str:
         query = " ".join(filter(None, keywords)).strip()
         if not query:
             return self.placeholder_url
@@ -126,28 +149,42 @@ class ProductImageProvider:
 
         url = None
         if self.unsplash_key:
-            url = self._query_unsplash(query)
+            timeout = self.breaker.acquire(deadline)
+            if timeout is None:
+                # Unsplash đang lỗi hoặc request sắp hết hạn: dùng ảnh mặc định, không cache để lần sau thử lại.
+                return self.placeholder_url
+            url = self._query_unsplash(query, timeout)
 
         if not url:
-            url = f"https://source.unsplash.com/400x400/?{query.replace(' ', '+')}"
+            url = self._fallback_url(query)
 
         self.cache[query] = url
         return url
 
-    def _query_unsplash(self, query: str) -> Optional[str]:
+    @staticmethod
+    def _fallback_url(query: str) -> str:
+        return f"https://source.unsplash.com/400x400/?{query.replace(' ', '+')}"
+
+    def _query_unsplash(self, query: str, timeout: float = 10) -> Optional[str]:
         endpoint = "https://api.unsplash.com/search/photos"
         params = {"query": query, "per_page": 1, "orientation": "squarish"}
         headers = {"Authorization": f"Client-ID {self.unsplash_key}"}
+        start = time.monotonic()
         try:
-            r = requests.get(endpoint, headers=headers, params=params, timeout=10)
+            r = requests.get(endpoint, headers=headers, params=params, timeout=timeout)
             r.raise_for_status()
             data = r.json()
-            results: List[dict] = data.get("results", [])
-            if not results:
-                return None
-            return results[0]["urls"].get("regular")
-        except requests.RequestException:
+        except (requests.RequestException, ValueError):
+            self.breaker.record_failure()
             return None
+        self.breaker.record_success(time.monotonic() - start)
+        return self._parse_unsplash(data)
+
+    def _parse_unsplash(self, data: Any) -> Optional[str]:
+        results: List[dict] = data.get("results", []) if isinstance(data, dict) else []
+        if not results:
+            return None
+        return results[0].get("urls", {}).get("regular")
 
 
 class TikiAPI:
@@ -167,6 +204,7 @@ class TikiAPI:
         self.enabled = enabled
         self.base_url = base_url or os.getenv("TIKI_API_BASE", "https://tiki.vn/api/v2")
         self.timeout = timeout
+        self.breaker = CircuitBreaker("tiki", max_timeout=timeout, slow_call_seconds=timeout / 2)
         if prefetch_limit is None:
             prefetch_limit = int(os.getenv("TIKI_PREFETCH_LIMIT", "8"))
         self.prefetch_limit = max(0, prefetch_limit)
@@ -187,14 +225,27 @@ class TikiAPI:
     def is_enabled(self) -> bool:
         return self.enabled
 
-    def _request(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _request(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """None khi lỗi hoặc bị circuit breaker/deadline bỏ qua (kết quả không được cache)."""
+        timeout = self.breaker.acquire(deadline)
+        if timeout is None:
+            return None
         url = f"{self.base_url}{path}"
+        start = time.monotonic()
         try:
-            resp = self.session.get(url, params=params, timeout=self.timeout)
+            resp = self.session.get(url, params=params, timeout=timeout)
             resp.raise_for_status()
-            return resp.json()
-        except requests.RequestException:
-            return {}
+            data = resp.json()
+        except (requests.RequestException, ValueError):
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success(time.monotonic() - start)
+        return data
 
     def _normalize_product(self, item: Dict[str, Any]) -> Dict[str, Any]:
         url_path = (item.get("url_path") or "").lstrip("/")
@@ -223,7 +274,11 @@ class TikiAPI:
             "checked_at": datetime.utcnow().isoformat(),
         }
 
-    def search_products(self, keyword: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def search_products(self, keyword: str, limit: int = 5, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        return self._search(keyword, limit, deadline) or []
+
+    def _search(self, keyword: str, limit: int, deadline: Optional[Deadline]) -> Optional[List[Dict[str, Any]]]:
+        """Như search_products nhưng trả về None khi không gọi được Tiki."""
         if not self.enabled:
             return []
         query = (keyword or "").strip()
@@ -234,7 +289,12 @@ class TikiAPI:
             return self.search_cache[cache_key]
 
         params = {"limit": limit, "page": 1, "q": query}
-        payload = self._request("/products", params=params)
+        payload = self._request("/products", params=params, deadline=deadline)
+        if payload is None:
+            return None
+        return self._store_search(cache_key, payload)
+
+    def _store_search(self, cache_key: str, payload: Any) -> List[Dict[str, Any]]:
         items = payload.get("data") if isinstance(payload, dict) else None
         if not isinstance(items, list):
             self.search_cache[cache_key] = []
@@ -244,7 +304,7 @@ class TikiAPI:
         self.search_cache[cache_key] = normalized
         return normalized
 
-    def get_product_snapshot(self, keyword: str) -> Optional[Dict[str, Any]]:
+    def get_product_snapshot(self, keyword: str, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
         query = (keyword or "").strip()
         if not query:
             return None
@@ -252,19 +312,23 @@ class TikiAPI:
         if cache_key in self.snapshot_cache:
             return self.snapshot_cache[cache_key]
 
-        results = self.search_products(query, limit=1)
+        results = self._search(query, 1, deadline)
+        if results is None:
+            return None
         snapshot = results[0] if results else None
         self.snapshot_cache[cache_key] = snapshot
         return snapshot
 
-    def enrich_product_meta(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+    def enrich_product_meta(self, meta: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         if not self.enabled:
             return meta
         query = (meta.get("name") or meta.get("id") or "").strip()
         if not query:
             return meta
 
-        snapshot = self.get_product_snapshot(query)
+        return self._apply_snapshot(meta, self.get_product_snapshot(query, deadline=deadline))
+
+    def _apply_snapshot(self, meta: Dict[str, Any], snapshot: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         if not snapshot:
             return meta
 
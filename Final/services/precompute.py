@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    from services.forecast_service import ProductAnalyticsService
+
+
+class ForecastPrecomputer:
+    """
+    Thread nền tính trước dự báo cho toàn bộ catalog, series phổ biến được tính trước.
+    /api/predict đọc kết quả qua ProductAnalyticsService.get_precomputed_forecast khi còn mới.
+
+    Biến môi trường:
+    - ENABLE_FORECAST_PRECOMPUTE: bật thread (mặc định tắt).
+    - PRECOMPUTE_INTERVAL_SECONDS: khoảng nghỉ giữa hai lượt (mặc định 3600).
+    - PRECOMPUTE_HORIZONS: các horizon cần tính, ví dụ "7,14" (mặc định "7").
+    """
+
+    def __init__(
+        self,
+        service: "ProductAnalyticsService",
+        horizons: Optional[Sequence[int]] = None,
+        interval_seconds: Optional[float] = None,
+    ) -> None:
+        self.service = service
+        if horizons is None:
+            horizons = [int(value) for value in os.getenv("PRECOMPUTE_HORIZONS", "7").split(",") if value.strip()]
+        self.horizons = list(horizons)
+        if interval_seconds is None:
+            interval_seconds = float(os.getenv("PRECOMPUTE_INTERVAL_SECONDS", "3600"))
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return os.getenv("ENABLE_FORECAST_PRECOMPUTE", "").lower() in {"1", "true", "on"}
+
+    def run_once(self) -> int:
+        """Tính lại mọi series theo thứ tự phổ biến, trả về số dự báo đã lưu."""
+        computed = 0
+        for product_id, platform in self.service.series_by_popularity():
+            for future_days in self.horizons:
+                if self._stop.is_set():
+                    return computed
+                try:
+                    self.service.precompute_forecast(product_id, platform, future_days)
+                    computed += 1
+                except ValueError:
+                    # Series quá ngắn cho seq_len hiện tại, /api/predict cũng sẽ báo lỗi tương tự.
+                    break
+                except Exception as e:
+                    print(f"⚠️ Precompute {product_id}/{platform} failed:", e)
+                    break
+        return computed
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="forecast-precompute", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
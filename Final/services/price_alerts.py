@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ALERT_KINDS = ("below_rolling_min", "platform_undercut")
+
+
+@dataclass
+class PriceAlert:
+    id: int
+    kind: str
+    product_id: str
+    platform: str
+    date: str
+    price: float
+    reference: float
+    change_pct: float
+    reference_platform: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class RollingWindow:
+    """
+    Cửa sổ trượt theo ngày của một series: min/max bằng deque đơn điệu, mean bằng tổng chạy.
+    Mỗi phần tử vào và ra mỗi deque đúng một lần nên push có chi phí O(1) khấu hao.
+    """
+
+    __slots__ = ("days", "_entries", "_mins", "_maxs", "_sum")
+
+    def __init__(self, days: int) -> None:
+        self.days = days
+        self._entries: Deque[Tuple[int, float]] = deque()
+        self._mins: Deque[Tuple[int, float]] = deque()
+        self._maxs: Deque[Tuple[int, float]] = deque()
+        self._sum = 0.0
+
+    def evict(self, day: int) -> None:
+        """Bỏ các phần tử cũ hơn `days` ngày tính tới `day`."""
+        cutoff = day - self.days
+        entries = self._entries
+        while entries and entries[0][0] <= cutoff:
+            self._sum -= entries.popleft()[1]
+        while self._mins and self._mins[0][0] <= cutoff:
+            self._mins.popleft()
+        while self._maxs and self._maxs[0][0] <= cutoff:
+            self._maxs.popleft()
+
+    def push(self, day: int, price: float) -> None:
+        self._entries.append((day, price))
+        self._sum += price
+        mins, maxs = self._mins, self._maxs
+        while mins and mins[-1][1] >= price:
+            mins.pop()
+        mins.append((day, price))
+        while maxs and maxs[-1][1] <= price:
+            maxs.pop()
+        maxs.append((day, price))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._mins[0][1] if self._mins else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._maxs[0][1] if self._maxs else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._sum / len(self._entries) if self._entries else None
+
+
+def _to_day(value: Any) -> int:
+    return int(np.datetime64(pd.Timestamp(value), "D").astype(np.int64))
+
+
+def _day_to_str(day: int) -> str:
+    return str(np.datetime64(day, "D"))
+
+
+class PriceAlertEngine:
+    """
+    Engine cảnh báo giá chạy tăng dần trên các dòng giá mới (không quét lại DataFrame).
+
+    - below_rolling_min: giá mới thấp hơn giá thấp nhất của series trong `window_days` ngày trước đó.
+    - platform_undercut: giá một sàn thấp hơn giá mới nhất rẻ nhất của các sàn khác ít nhất `undercut_pct`%.
+      Chỉ bắn khi trạng thái chuyển từ "không rẻ hơn" sang "rẻ hơn" để không lặp lại mỗi ngày.
+
+    Mỗi dòng tốn O(1) khấu hao cho cửa sổ trượt và O(số sàn) cho so sánh giữa các sàn.
+    Dòng có ngày cũ hơn ngày cuối đã nạp của series bị bỏ qua (đếm trong `rows_out_of_order`): đẩy nó vào
+    cuối deque sẽ làm sai thứ tự loại bỏ và ghi đè giá mới nhất bằng giá cũ.
+
+    Biến môi trường:
+    - PRICE_ALERT_WINDOW_DAYS: độ dài cửa sổ (mặc định 30).
+    - PRICE_ALERT_UNDERCUT_PCT: ngưỡng chênh lệch giữa các sàn, tính theo % (mặc định 5).
+    """
+
+    def __init__(
+        self,
+        window_days: Optional[int] = None,
+        undercut_pct: Optional[float] = None,
+        min_history: int = 7,
+        max_alerts: int = 1000,
+    ) -> None:
+        if window_days is None:
+            window_days = int(os.getenv("PRICE_ALERT_WINDOW_DAYS", "30"))
+        if undercut_pct is None:
+            undercut_pct = float(os.getenv("PRICE_ALERT_UNDERCUT_PCT", "5"))
+        self.window_days = window_days
+        self.undercut_pct = undercut_pct
+        self.min_history = min_history
+        self.rows_ingested = 0
+        self.rows_out_of_order = 0
+        self._windows: Dict[Tuple[str, str], RollingWindow] = {}
+        self._last_day: Dict[Tuple[str, str], int] = {}
+        self._latest: Dict[str, Dict[str, float]] = {}
+        self._undercutting: set = set()
+        self._alerts: Deque[PriceAlert] = deque(maxlen=max_alerts)
+        self._next_id = 1
+        self._callbacks: List[Callable[[List[PriceAlert]], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[List[PriceAlert]], None]) -> None:
+        """Đăng ký hàm nhận danh sách cảnh báo mới sau mỗi lần ingest."""
+        self._callbacks.append(callback)
+
+    def _fire(
+        self,
+        fired: List[PriceAlert],
+        kind: str,
+        product_id: str,
+        platform: str,
+        day: int,
+        price: float,
+        reference: float,
+        reference_platform: Optional[str] = None,
+    ) -> None:
+        alert = PriceAlert(
+            id=self._next_id,
+            kind=kind,
+            product_id=product_id,
+            platform=platform,
+            date=_day_to_str(day),
+            price=price,
+            reference=reference,
+            change_pct=(price - reference) / reference * 100 if reference else 0.0,
+            reference_platform=reference_platform,
+        )
+        self._next_id += 1
+        self._alerts.append(alert)
+        fired.append(alert)
+
+    def _ingest(
+        self,
+        product_id: str,
+        platform: str,
+        day: int,
+        price: float,
+        fired: Optional[List[PriceAlert]],
+    ) -> None:
+        key = (product_id, platform)
+        last_day = self._last_day.get(key)
+        if last_day is not None and day < last_day:
+            self.rows_out_of_order += 1
+            return
+        self._last_day[key] = day
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = RollingWindow(self.window_days)
+        window.evict(day)
+        rolling_min = window.min
+        if fired is not None and rolling_min is not None and len(window) >= self.min_history and price < rolling_min:
+            self._fire(fired, "below_rolling_min", product_id, platform, day, price, rolling_min)
+        window.push(day, price)
+
+        latest = self._latest.setdefault(product_id, {})
+        latest[platform] = price
+        cheapest_platform, cheapest = None, None
+        for other, other_price in latest.items():
+            if other != platform and (cheapest is None or other_price < cheapest):
+                cheapest_platform, cheapest = other, other_price
+        undercuts = cheapest is not None and price <= cheapest * (1 - self.undercut_pct / 100)
+        if not undercuts:
+            self._undercutting.discard(key)
+        elif key not in self._undercutting:
+            self._undercutting.add(key)
+            if fired is not None:
+                self._fire(fired, "platform_undercut", product_id, platform, day, price, cheapest, cheapest_platform)
+        self.rows_ingested += 1
+
+    def bootstrap(self, df: pd.DataFrame) -> None:
+        """Nạp lịch sử có sẵn (đã sắp theo ngày) vào trạng thái cửa sổ mà không bắn cảnh báo."""
+        days = df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+        prices = df["price"].to_numpy(dtype=np.float64)
+        with self._lock:
+            for product_id, platform, day, price in zip(df["product_id"], df["platform"], days, prices):
+                if not np.isnan(price):
+                    self._ingest(product_id, platform, int(day), float(price), None)
+
+    def ingest(self, rows: Iterable[Dict[str, Any]]) -> List[PriceAlert]:
+        """Nạp các dòng mới (product_id, platform, date, price) theo thứ tự thời gian, trả về cảnh báo đã bắn."""
+        fired: List[PriceAlert] = []
+        with self._lock:
+            for row in rows:
+                self._ingest(row["product_id"], row["platform"], _to_day(row["date"]), float(row["price"]), fired)
+        if fired:
+            for callback in list(self._callbacks):
+                try:
+                    callback(fired)
+                except Exception as e:
+                    print("⚠️ Price alert callback failed:", e)
+        return fired
+
+    def alerts(self, since: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Cảnh báo có id > `since` (client lưu id cuối cùng để poll tiếp)."""
+        with self._lock:
+            items = [alert for alert in self._alerts if alert.id > since]
+        return [alert.to_dict() for alert in items[:limit]]
+
+    def series_state(self, product_id: str, platform: str) -> Optional[Dict[str, Any]]:
+        window = self._windows.get((product_id, platform))
+        if window is None or not len(window):
+            return None
+        return {"min": window.min, "max": window.max, "mean": window.mean, "count": len(window)}
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+"""
+Circuit breaker + timeout thích ứng cho các lời gọi ra ngoài (Tiki, Unsplash, LLM) và ngân sách thời gian
+cho từng request. Khi upstream đang lỗi/chậm hoặc request sắp hết hạn, client bỏ qua lời gọi và dùng
+fallback ngay (ảnh mặc định, tóm tắt theo luật, không có giá live) thay vì chờ hết timeout cố định.
+"""
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class Deadline:
+    """Mốc hết hạn của một request; truyền xuống mọi lời gọi ngoài để chúng chia nhau phần thời gian còn lại."""
+
+    def __init__(self, seconds: float) -> None:
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> Optional["Deadline"]:
+        return cls(seconds) if seconds else None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """
+    - closed: gọi bình thường; `failure_threshold` lần lỗi (hoặc chậm hơn `slow_call_seconds`) liên tiếp thì mở.
+    - open: từ chối ngay trong `reset_timeout` giây.
+    - half_open: cho đúng một lời gọi thử; thành công thì đóng lại, thất bại thì mở tiếp.
+
+    Timeout mỗi lời gọi = p95 độ trễ các lần thành công gần đây x `timeout_multiplier`, kẹp trong
+    [min_timeout, max_timeout] (max_timeout là timeout cố định cũ), và không vượt quá phần còn lại của deadline.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_timeout: float,
+        min_timeout: float = 0.5,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        timeout_multiplier: float = 2.0,
+        min_samples: int = 5,
+        window: int = 100,
+    ) -> None:
+        if failure_threshold is None:
+            failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        if reset_timeout is None:
+            reset_timeout = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+        self.name = name
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.timeout_multiplier = timeout_multiplier
+        self.min_samples = min_samples
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def adaptive_timeout(self) -> float:
+        p95 = self.p95()
+        if p95 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p95 * self.timeout_multiplier))
+
+    def acquire(self, deadline: Optional[Deadline] = None) -> Optional[float]:
+        """Timeout cho lời gọi sắp thực hiện, hoặc None nếu phải dùng fallback ngay."""
+        timeout = self.adaptive_timeout()
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+            if timeout < self.min_timeout:
+                return None
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return None
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN:
+                # Lời gọi thử bị hủy giữa chừng (không kịp record) thì quá max_timeout cho thử lại.
+                if self._probe_in_flight and time.monotonic() - self._probe_started < self.max_timeout:
+                    return None
+                self._probe_in_flight = True
+                self._probe_started = time.monotonic()
+        return timeout
+
+    def record_success(self, latency: float) -> None:
+        if self.slow_call_seconds is not None and latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._latencies.append(latency)
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            self.state = CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"⚠️ Circuit {self.name} mở sau {self.consecutive_failures} lỗi liên tiếp.")
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "p95_seconds": self.p95(),
+            "timeout_seconds": self.adaptive_timeout(),
+        }
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+HISTORY_FORMATS = ("records", "columnar", "columnar_delta")
+
+
+def lttb_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: chọn `max_points` chỉ số giữ hình dạng đường giá
+    (luôn giữ điểm đầu/cuối, mỗi bucket giữ điểm tạo tam giác lớn nhất với điểm trước và trung bình bucket sau).
+    """
+    if max_points < 2:
+        raise ValueError("max_points phải >= 2 để giữ cả điểm đầu và điểm cuối.")
+    n = len(values)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points == 2:
+        return np.array([0, n - 1])
+
+    y = np.asarray(values, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    prev = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = edges[bucket + 1], (edges[bucket + 2] if bucket + 2 < len(edges) else n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Diện tích (x2) tam giác tạo bởi điểm đã chọn trước đó, ứng viên và trung bình bucket kế tiếp.
+        areas = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(areas))
+        selected[bucket + 1] = prev
+    return selected
+
+
+def _delta_encode(values: Sequence[float]) -> Dict[str, Any]:
+    if not len(values):
+        return {"start": None, "deltas": []}
+    return {"start": values[0], "deltas": np.diff(values).tolist()}
+
+
+def encode_history(dates: np.ndarray, prices: np.ndarray, fmt: str = "records") -> Any:
+    """
+    dates: mảng datetime64[D]; prices: mảng float.
+    - records: [{"date", "price"}] (định dạng cũ).
+    - columnar: {"dates": [...], "prices": [...]}.
+    - columnar_delta: ngày/giá dạng {"start", "deltas"} (delta ngày tính bằng số ngày).
+    """
+    if fmt not in HISTORY_FORMATS:
+        raise ValueError(f"history_format không hợp lệ: {fmt}")
+    price_list: List[float] = np.asarray(prices, dtype=np.float64).tolist()
+    if fmt == "columnar_delta":
+        day_numbers = dates.astype("datetime64[D]").astype(np.int64)
+        encoded_dates = _delta_encode(day_numbers.tolist())
+        if len(dates):
+            encoded_dates["start"] = str(dates[0].astype("datetime64[D]"))
+        return {"dates": encoded_dates, "prices": _delta_encode(price_list)}
+
+    date_list = np.datetime_as_string(dates.astype("datetime64[D]"), unit="D").tolist()
+    if fmt == "columnar":
+        return {"dates": date_list, "prices": price_list}
+    return [{"date": date, "price": price} for date, price in zip(date_list, price_list)]
@@ -3,6 +3,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
     const siteSelect = document.getElementById("site-select");
     const productSelect = document.getElementById("product-select");
+    const productSearchInput = document.getElementById("product-search");
     const loadDataBtn = document.getElementById("load-data-btn");
     const predictBtn = document.getElementById("predict-btn");
 
@@ -36,7 +37,11 @@ document.addEventListener("DOMContentLoaded", () => {
     const forecastDaysSelect = document.getElementById("forecast-days");
     const historyRangeSelect = document.getElementById("history-range-select");
 
-    let catalog = { platforms: [], products: [] };
+    const CATALOG_PAGE_SIZE = 50;
+    const LOAD_MORE_VALUE = "__more__";
+    // Trang sản phẩm đang hiển thị trong product-select (tìm kiếm + phân trang chạy ở /api/catalog).
+    let productQuery = { q: "", page: 0, loaded: 0, total: 0 };
+    let searchTimer = null;
     let currentMetrics = null;
     let currentPrediction = null;
 
@@ -100,23 +105,73 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    function fetchCatalogPage(query, page) {
+        const params = new URLSearchParams({ fields: "id,name", page_size: CATALOG_PAGE_SIZE, page });
+        if (query) {
+            params.set("q", query);
+        }
+        return fetchJSON(`${API_BASE}/api/catalog?${params}`);
+    }
+
+    function renderProductPage(pageData, append) {
+        const moreOption = productSelect.querySelector(`option[value="${LOAD_MORE_VALUE}"]`);
+        if (moreOption) moreOption.remove();
+        if (!append) productSelect.innerHTML = "";
+
+        pageData.products.forEach(product => {
+            const option = document.createElement("option");
+            option.value = product.id;
+            option.textContent = product.name;
+            productSelect.appendChild(option);
+        });
+        productQuery.loaded += pageData.products.length;
+        productQuery.total = pageData.total;
+
+        if (productQuery.loaded === 0) {
+            const option = document.createElement("option");
+            option.value = "";
+            option.textContent = "Không tìm thấy sản phẩm";
+            productSelect.appendChild(option);
+        } else if (productQuery.loaded < productQuery.total) {
+            const option = document.createElement("option");
+            option.value = LOAD_MORE_VALUE;
+            option.textContent = `Xem thêm (${productQuery.total - productQuery.loaded} sản phẩm)...`;
+            productSelect.appendChild(option);
+        }
+    }
+
+    async function loadProducts(query) {
+        productQuery = { q: query, page: 1, loaded: 0, total: 0 };
+        const pageData = await fetchCatalogPage(query, 1);
+        // Bỏ kết quả của truy vấn cũ nếu người dùng đã gõ tiếp.
+        if (productQuery.q === query) {
+            renderProductPage(pageData, false);
+        }
+        return pageData;
+    }
+
+    async function loadMoreProducts() {
+        const query = productQuery.q;
+        const page = productQuery.page + 1;
+        const firstNewIndex = productQuery.loaded;
+        const pageData = await fetchCatalogPage(query, page);
+        if (productQuery.q !== query) return;
+        productQuery.page = page;
+        renderProductPage(pageData, true);
+        productSelect.selectedIndex = Math.min(firstNewIndex, productSelect.options.length - 1);
+    }
+
     async function loadCatalog() {
         try {
-            const data = await fetchJSON(`${API_BASE}/api/catalog`);
-            catalog = data;
+            // Chỉ tải trang đầu để hiển thị ngay; các trang sau và kết quả tìm kiếm lấy theo yêu cầu.
+            const pageData = await loadProducts("");
 
-            const platformOptions = catalog.platforms.map(pf => ({
+            const platformOptions = pageData.platforms.map(pf => ({
                 value: pf,
                 label: pf.charAt(0).toUpperCase() + pf.slice(1)
             }));
             populateSelect(siteSelect, platformOptions, item => item.label);
 
-            const productOptions = catalog.products.map(product => ({
-                value: product.id,
-                label: product.name
-            }));
-            populateSelect(productSelect, productOptions, item => item.label);
-
             loadDataBtn.disabled = false;
         } catch (error) {
             showError(error.message);
@@ -345,7 +400,7 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     async function fetchProductMetrics() {
-        if (!productSelect.value || !siteSelect.value) {
+        if (!productSelect.value || productSelect.value === LOAD_MORE_VALUE || !siteSelect.value) {
             showError("Vui lòng chọn sản phẩm và sàn TMĐT.");
             return;
         }
@@ -361,6 +416,7 @@ document.addEventListener("DOMContentLoaded", () => {
                 product_id: productSelect.value,
                 platform: siteSelect.value,
                 history_days: historyRangeSelect ? parseInt(historyRangeSelect.value, 10) || 30 : 30,
+                max_points: 240,
             };
             const data = await fetchJSON(`${API_BASE}/api/metrics`, {
                 method: "POST",
@@ -424,6 +480,20 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     }
 
+    productSelect.addEventListener("change", () => {
+        if (productSelect.value === LOAD_MORE_VALUE) {
+            loadMoreProducts().catch(error => showError(error.message));
+        }
+    });
+    if (productSearchInput) {
+        productSearchInput.addEventListener("input", () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => {
+                loadProducts(productSearchInput.value.trim()).catch(error => showError(error.message));
+            }, 250);
+        });
+    }
+
     loadDataBtn.addEventListener("click", fetchProductMetrics);
     predictBtn.addEventListener("click", fetchPrediction);
     if (forecastDaysSelect) {
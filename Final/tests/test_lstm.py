@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch import nn
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from models.LSTM import ForecastConfig, _fit_model, build_dataloaders  # noqa: E402
+
+
+def test_fit_model_averages_test_loss_over_every_test_batch_in_direct_mode():
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+    data_scaled = rng.random((120, 2)).astype(np.float32)
+    config = ForecastConfig(
+        csv_path="",
+        product_id="",
+        platform="",
+        seq_len=10,
+        batch_size=4,
+        epochs=1,
+        forecast_mode="direct",
+        max_horizon=5,
+    )
+    train_loader, test_loader = build_dataloaders(
+        data_scaled, config.seq_len, config.batch_size, horizon=config.output_size
+    )
+    assert len(test_loader) > 1
+
+    model, _, test_loss = _fit_model(train_loader, test_loader, data_scaled.shape[1], config, "cpu")
+
+    model.eval()
+    criterion = nn.MSELoss()
+    with torch.no_grad():
+        batch_losses = [(criterion(model(xb), yb).item(), len(xb)) for xb, yb in test_loader]
+    expected = sum(loss * size for loss, size in batch_losses) / len(test_loader.dataset)
+    assert np.isclose(test_loss, expected, rtol=1e-5)
+    assert not np.isclose(test_loss, batch_losses[-1][0] * batch_losses[-1][1] / len(test_loader.dataset))